@@ -2,18 +2,15 @@
 AI Trading Engine for XRPL DEX Platform
 """
 
-from .ai_trading_engine import AITradingEngine, TradingSignal, MarketData, TechnicalIndicator
-from .trading_strategies import TradingStrategy, MomentumStrategy, MeanReversionStrategy
-from .risk_management import RiskManager, PositionSizer
+from .ai_trading_engine import (
+    AITradingEngine, TradingSignal, TradingPosition, PortfolioMetrics, StrategyType, SignalType
+)
 
 __all__ = [
     'AITradingEngine',
-    'TradingSignal', 
-    'MarketData',
-    'TechnicalIndicator',
-    'TradingStrategy',
-    'MomentumStrategy',
-    'MeanReversionStrategy',
-    'RiskManager',
-    'PositionSizer'
+    'TradingSignal',
+    'TradingPosition',
+    'PortfolioMetrics',
+    'StrategyType',
+    'SignalType'
 ]
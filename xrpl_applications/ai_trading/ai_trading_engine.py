@@ -5,12 +5,15 @@ Advanced AI-powered trading strategies and portfolio management
 """
 
 import asyncio
+import bisect
 import logging
+import math
 import time
 import json
+from collections import deque
 from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, field
-from decimal import Decimal
+from decimal import Decimal, ROUND_DOWN
 from enum import Enum
 import numpy as np
 import pandas as pd
@@ -31,6 +34,12 @@ try:
 except ImportError:
     PYTORCH_AVAILABLE = False
 
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.model_selection import train_test_split
@@ -42,6 +51,33 @@ from config import AI_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Precision of the public Decimal price/PnL fields; float mirrors are rounded to it
+_DECIMAL_QUANTUM = Decimal('1e-8')
+
+def _tf_device() -> str:
+    """Select the TensorFlow device, preferring the GPU so RNNs run on cuDNN"""
+    return '/GPU:0' if tf.config.list_physical_devices('GPU') else '/CPU:0'
+
+def _return_stats(values: np.ndarray) -> Tuple[float, float, int]:
+    """Single-pass mean and population std of period returns (Welford)"""
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, values.shape[0]):
+        prev = values[i - 1]
+        if prev > 0:
+            r = (values[i] - prev) / prev
+            n += 1
+            delta = r - mean
+            mean += delta / n
+            m2 += delta * (r - mean)
+    if n == 0:
+        return 0.0, 0.0, 0
+    return mean, math.sqrt(m2 / n), n
+
+if NUMBA_AVAILABLE:
+    _return_stats = numba.njit(cache=True, fastmath=True)(_return_stats)
+
 class StrategyType(Enum):
     """Trading strategy types"""
     MOMENTUM = "momentum"
@@ -68,7 +104,7 @@ class ModelType(Enum):
     GRADIENT_BOOSTING = "gradient_boosting"
     ENSEMBLE = "ensemble"
 
-@dataclass
+@dataclass(slots=True)
 class TradingSignal:
     """Trading signal representation"""
     id: str
@@ -81,7 +117,7 @@ class TradingSignal:
     timestamp: float
     metadata: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class TradingPosition:
     """Trading position representation"""
     id: str
@@ -96,8 +132,34 @@ class TradingPosition:
     timestamp: float
     strategy: StrategyType
     status: str = "open"
+    
+    # Float mirrors used on the per-tick portfolio update path
+    _entry_price_f: float = field(default=0.0, init=False, repr=False, compare=False)
+    _amount_f: float = field(default=0.0, init=False, repr=False, compare=False)
+    _current_price_f: float = field(default=0.0, init=False, repr=False, compare=False)
+    _pnl_f: float = field(default=0.0, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._entry_price_f = float(self.entry_price)
+        self._amount_f = float(self.amount)
+        self._current_price_f = float(self.current_price)
+        self._pnl_f = float(self.pnl)
+    
+    def sync_decimals(self):
+        """Materialize the Decimal price and PnL fields from the float mirrors"""
+        # Quantize so float noise (19.999999999999996) never reaches the Decimal API
+        self.current_price = Decimal(repr(self._current_price_f)).quantize(_DECIMAL_QUANTUM)
+        self.pnl = Decimal(repr(self._pnl_f)).quantize(_DECIMAL_QUANTUM)
+
+@dataclass(slots=True)
+class PortfolioSnapshot:
+    """Point-in-time portfolio totals"""
+    timestamp: float
+    total_value: float
+    total_pnl: float
+    positions_count: int
 
-@dataclass
+@dataclass(slots=True)
 class PortfolioMetrics:
     """Portfolio performance metrics"""
     total_value: Decimal
@@ -120,6 +182,7 @@ class MLModel:
         self.model = None
         self.scaler = StandardScaler()
         self.is_trained = False
+        self._inference_fn = None
         
     def prepare_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare data for training/prediction"""
@@ -217,6 +280,7 @@ class MLModel:
             else:
                 logger.error(f"Unsupported model type: {self.model_type}")
                 return False
+            self._inference_fn = None
             
             # Train
             if self.model_type in [ModelType.RANDOM_FOREST, ModelType.GRADIENT_BOOSTING]:
@@ -279,61 +343,148 @@ class MLModel:
             logger.error(f"Failed to make prediction: {e}")
             return None
     
-    def _create_lstm_model(self, input_dim: int) -> keras.Model:
+    def predict_batch(self, frames: List[pd.DataFrame]) -> List[Optional[float]]:
+        """Make one prediction per data frame with a single model call"""
+        if not self.is_trained or self.model is None:
+            logger.warning("Model not trained")
+            return [None] * len(frames)
+        
+        try:
+            results: List[Optional[float]] = [None] * len(frames)
+            rows = []
+            indices = []
+            for i, data in enumerate(frames):
+                # A bad frame only loses its own prediction
+                try:
+                    X, _ = self.prepare_data(data)
+                except Exception as e:
+                    logger.error(f"Failed to prepare frame {i} for batch prediction: {e}")
+                    continue
+                if len(X) == 0:
+                    continue
+                rows.append(X[-1])
+                indices.append(i)
+            
+            if not rows:
+                return results
+            
+            X_batch = self.scaler.transform(np.vstack(rows))
+            
+            if self.model_type in [ModelType.RANDOM_FOREST, ModelType.GRADIENT_BOOSTING]:
+                predictions = self.model.predict(X_batch)
+            else:
+                # For neural networks: one tensor, one compiled call
+                X_batch = X_batch.reshape((X_batch.shape[0], 1, X_batch.shape[1]))
+                with tf.device(_tf_device()):
+                    X_tensor = tf.constant(X_batch, dtype=tf.float32)
+                    predictions = self._get_inference_fn()(X_tensor).numpy().reshape(-1)
+            
+            for i, prediction in zip(indices, predictions):
+                results[i] = float(prediction)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Failed to make batch prediction: {e}")
+            return [None] * len(frames)
+    
+    def _get_inference_fn(self):
+        """Get the compiled inference function for neural network models"""
+        if self._inference_fn is None:
+            model = self.model
+            
+            @tf.function(reduce_retracing=True)
+            def infer(x):
+                return model(x, training=False)
+            
+            self._inference_fn = infer
+        
+        return self._inference_fn
+    
+    def _create_lstm_model(self, input_dim: int) -> 'keras.Model':
         """Create LSTM model"""
-        model = keras.Sequential([
-            keras.layers.LSTM(
-                units=self.config.get('lstm_units', 128),
-                return_sequences=True,
-                input_shape=(1, input_dim),
-                dropout=self.config.get('dropout_rate', 0.2)
-            ),
-            keras.layers.LSTM(
-                units=self.config.get('lstm_units', 128) // 2,
-                dropout=self.config.get('dropout_rate', 0.2)
-            ),
-            keras.layers.Dense(64, activation='relu'),
-            keras.layers.Dropout(self.config.get('dropout_rate', 0.2)),
-            keras.layers.Dense(1)
-        ])
-        
-        model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=self.config.get('learning_rate', 0.001)),
-            loss='mse',
-            metrics=['mae']
-        )
+        # Default activations, no recurrent dropout and unroll=False keep
+        # the layers eligible for the fused cuDNN kernel
+        with tf.device(_tf_device()):
+            model = keras.Sequential([
+                keras.layers.LSTM(
+                    units=self.config.get('lstm_units', 128),
+                    return_sequences=True,
+                    input_shape=(1, input_dim),
+                    activation='tanh',
+                    recurrent_activation='sigmoid',
+                    dropout=self.config.get('dropout_rate', 0.2),
+                    recurrent_dropout=0.0,
+                    unroll=False
+                ),
+                keras.layers.LSTM(
+                    units=self.config.get('lstm_units', 128) // 2,
+                    activation='tanh',
+                    recurrent_activation='sigmoid',
+                    dropout=self.config.get('dropout_rate', 0.2),
+                    recurrent_dropout=0.0,
+                    unroll=False
+                ),
+                keras.layers.Dense(64, activation='relu'),
+                keras.layers.Dropout(self.config.get('dropout_rate', 0.2)),
+                keras.layers.Dense(1)
+            ])
+            
+            model.compile(
+                optimizer=keras.optimizers.Adam(learning_rate=self.config.get('learning_rate', 0.001)),
+                loss='mse',
+                metrics=['mae']
+            )
         
         return model
     
-    def _create_gru_model(self, input_dim: int) -> keras.Model:
+    def _create_gru_model(self, input_dim: int) -> 'keras.Model':
         """Create GRU model"""
-        model = keras.Sequential([
-            keras.layers.GRU(
-                units=self.config.get('lstm_units', 128),
-                return_sequences=True,
-                input_shape=(1, input_dim),
-                dropout=self.config.get('dropout_rate', 0.2)
-            ),
-            keras.layers.GRU(
-                units=self.config.get('lstm_units', 128) // 2,
-                dropout=self.config.get('dropout_rate', 0.2)
-            ),
-            keras.layers.Dense(64, activation='relu'),
-            keras.layers.Dropout(self.config.get('dropout_rate', 0.2)),
-            keras.layers.Dense(1)
-        ])
-        
-        model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=self.config.get('learning_rate', 0.001)),
-            loss='mse',
-            metrics=['mae']
-        )
+        # reset_after=True is the cuDNN-compatible GRU variant
+        with tf.device(_tf_device()):
+            model = keras.Sequential([
+                keras.layers.GRU(
+                    units=self.config.get('lstm_units', 128),
+                    return_sequences=True,
+                    input_shape=(1, input_dim),
+                    activation='tanh',
+                    recurrent_activation='sigmoid',
+                    dropout=self.config.get('dropout_rate', 0.2),
+                    recurrent_dropout=0.0,
+                    unroll=False,
+                    reset_after=True
+                ),
+                keras.layers.GRU(
+                    units=self.config.get('lstm_units', 128) // 2,
+                    activation='tanh',
+                    recurrent_activation='sigmoid',
+                    dropout=self.config.get('dropout_rate', 0.2),
+                    recurrent_dropout=0.0,
+                    unroll=False,
+                    reset_after=True
+                ),
+                keras.layers.Dense(64, activation='relu'),
+                keras.layers.Dropout(self.config.get('dropout_rate', 0.2)),
+                keras.layers.Dense(1)
+            ])
+            
+            model.compile(
+                optimizer=keras.optimizers.Adam(learning_rate=self.config.get('learning_rate', 0.001)),
+                loss='mse',
+                metrics=['mae']
+            )
         
         return model
 
 class AITradingEngine:
     """Main AI trading engine"""
     
+    # Position size multipliers by strategy (default 1.0)
+    _STRATEGY_MULT: Dict[StrategyType, float] = {
+        StrategyType.ARBITRAGE: 0.5,  # Smaller positions for arbitrage
+        StrategyType.MACHINE_LEARNING: 0.8  # Moderate positions for ML signals
+    }
+    
     def __init__(self, xrpl_client: XRPLClient, dex_engine: DEXTradingEngine):
         self.xrpl_client = xrpl_client
         self.dex_engine = dex_engine
@@ -346,9 +497,22 @@ class AITradingEngine:
         
         # Trading positions
         self.positions: Dict[str, TradingPosition] = {}
+        self._open_positions: Dict[str, TradingPosition] = {}
+        self._closed_positions: Dict[str, TradingPosition] = {}
+        self._pair_index: Dict[Tuple[str, str], Dict[str, TradingPosition]] = {}
+        
+        # Running totals over open positions, updated by per-position deltas
+        self._total_value_f = 0.0
+        self._total_pnl_f = 0.0
         
         # Portfolio tracking
-        self.portfolio_history: List[Dict[str, Any]] = []
+        # Keep only last 1000 snapshots
+        self.portfolio_history: deque[PortfolioSnapshot] = deque(maxlen=1000)
+        self._snapshot_values: deque = deque(maxlen=1000)
+        self._snapshot_ts: deque = deque(maxlen=1000)  # sorted; bisected in get_portfolio_metrics
+        self._peak_value = 0.0
+        self._max_drawdown = 0.0
+        self._last_snapshot_key: Optional[Tuple[float, float, int]] = None
         
         # Strategy configurations
         self.strategy_configs: Dict[StrategyType, Dict[str, Any]] = {
@@ -375,6 +539,10 @@ class AITradingEngine:
         
         # Initialize models
         self._init_models()
+        
+        # Compile the metrics kernel up front rather than on first dashboard call
+        if NUMBA_AVAILABLE:
+            _return_stats(np.ones(2, dtype=np.float64))
     
     def _init_models(self):
         """Initialize machine learning models"""
@@ -442,12 +610,15 @@ class AITradingEngine:
         signals = []
         
         try:
-            for currency_pair, data in market_data.items():
-                if len(data) < 100:  # Need sufficient data
-                    continue
-                
+            # Need sufficient data
+            eligible = {pair: data for pair, data in market_data.items() if len(data) >= 100}
+            
+            # Batch AI predictions across all pairs
+            predictions = self._batch_predict(eligible)
+            
+            for currency_pair, data in eligible.items():
                 # Get AI predictions
-                ai_signals = await self._get_ai_signals(currency_pair, data)
+                ai_signals = await self._get_ai_signals(currency_pair, data, predictions.get(currency_pair))
                 signals.extend(ai_signals)
                 
                 # Get strategy signals
@@ -464,7 +635,23 @@ class AITradingEngine:
             logger.error(f"Failed to generate signals: {e}")
             return []
     
-    async def _get_ai_signals(self, currency_pair: str, data: pd.DataFrame) -> List[TradingSignal]:
+    def _batch_predict(self, market_data: Dict[str, pd.DataFrame]) -> Dict[str, Dict[ModelType, Optional[float]]]:
+        """Run each trained model once over all currency pairs"""
+        predictions: Dict[str, Dict[ModelType, Optional[float]]] = {pair: {} for pair in market_data}
+        pairs = list(market_data)
+        frames = list(market_data.values())
+        
+        for model_type, model in self.models.items():
+            if not model.is_trained or not frames:
+                continue
+            
+            for pair, prediction in zip(pairs, model.predict_batch(frames)):
+                predictions[pair][model_type] = prediction
+        
+        return predictions
+    
+    async def _get_ai_signals(self, currency_pair: str, data: pd.DataFrame,
+                              predictions: Optional[Dict[ModelType, Optional[float]]] = None) -> List[TradingSignal]:
         """Get signals from AI models"""
         signals = []
         
@@ -473,7 +660,10 @@ class AITradingEngine:
                 if not model.is_trained:
                     continue
                 
-                prediction = model.predict(data)
+                if predictions is not None and model_type in predictions:
+                    prediction = predictions[model_type]
+                else:
+                    prediction = model.predict(data)
                 if prediction is None:
                     continue
                 
@@ -723,7 +913,7 @@ class AITradingEngine:
                     strategy=signal.strategy
                 )
                 
-                self.positions[position.id] = position
+                self._add_position(position)
                 logger.info(f"Buy order executed: {order.id}")
                 return order.id
             
@@ -758,10 +948,13 @@ class AITradingEngine:
             
             if order:
                 # Close position
-                position.status = "closed"
+                self._set_status(position, "closed")
                 position.current_price = signal.price
                 position.pnl = (signal.price - position.entry_price) * position.amount
-                position.pnl_percentage = float(position.pnl / (position.entry_price * position.amount) * 100)
+                position._current_price_f = float(position.current_price)
+                position._pnl_f = float(position.pnl)
+                cost_f = position._entry_price_f * position._amount_f
+                position.pnl_percentage = position._pnl_f / cost_f * 100.0 if cost_f else 0.0
                 
                 logger.info(f"Sell order executed: {order.id}")
                 return order.id
@@ -776,70 +969,128 @@ class AITradingEngine:
         """Calculate position size based on signal confidence and strategy"""
         base_size = AI_CONFIG.max_position_size
         
-        # Adjust based on confidence
-        confidence_multiplier = signal.confidence
+        # Adjust based on confidence and strategy
+        strategy_multiplier = self._STRATEGY_MULT.get(signal.strategy, 1.0)
+        position_size = base_size * signal.confidence * strategy_multiplier
         
-        # Adjust based on strategy
-        strategy_multiplier = 1.0
-        if signal.strategy == StrategyType.ARBITRAGE:
-            strategy_multiplier = 0.5  # Smaller positions for arbitrage
-        elif signal.strategy == StrategyType.MACHINE_LEARNING:
-            strategy_multiplier = 0.8  # Moderate positions for ML signals
-        
-        position_size = base_size * confidence_multiplier * strategy_multiplier
-        
-        return Decimal(str(position_size))
+        # The DEX rejects amounts finer than its lot size, so truncate to it
+        return Decimal(repr(position_size)).quantize(_DECIMAL_QUANTUM, rounding=ROUND_DOWN)
     
     def _find_position(self, base_currency: str, quote_currency: str) -> Optional[TradingPosition]:
         """Find existing position for currency pair"""
-        for position in self.positions.values():
-            if (position.base_currency == base_currency and 
-                position.quote_currency == quote_currency and 
-                position.status == "open"):
-                return position
+        pair_positions = self._pair_index.get((base_currency, quote_currency))
+        if pair_positions:
+            return next(iter(pair_positions.values()))
         return None
     
+    def _add_position(self, position: TradingPosition):
+        """Register a new position"""
+        self.positions[position.id] = position
+        self._index_position(position)
+    
+    def _set_status(self, position: TradingPosition, status: str):
+        """Change a position's status, moving it between the status indices"""
+        if position.status == status:
+            return
+        
+        self._unindex_position(position)
+        position.status = status
+        self._index_position(position)
+    
+    def _index_position(self, position: TradingPosition):
+        """Add a position to the index for its current status"""
+        if position.status == "open":
+            self._open_positions[position.id] = position
+            pair_key = (position.base_currency, position.quote_currency)
+            self._pair_index.setdefault(pair_key, {})[position.id] = position
+            self._total_value_f += position._current_price_f * position._amount_f
+            self._total_pnl_f += position._pnl_f
+        elif position.status == "closed":
+            self._closed_positions[position.id] = position
+    
+    def _unindex_position(self, position: TradingPosition):
+        """Remove a position from the index for its current status"""
+        if position.status == "open":
+            self._open_positions.pop(position.id, None)
+            pair_key = (position.base_currency, position.quote_currency)
+            pair_positions = self._pair_index.get(pair_key)
+            if pair_positions is not None:
+                pair_positions.pop(position.id, None)
+                if not pair_positions:
+                    del self._pair_index[pair_key]
+            if self._open_positions:
+                self._total_value_f -= position._current_price_f * position._amount_f
+                self._total_pnl_f -= position._pnl_f
+            else:
+                # Reset rather than accumulate float drift once nothing is open
+                self._total_value_f = 0.0
+                self._total_pnl_f = 0.0
+        elif position.status == "closed":
+            self._closed_positions.pop(position.id, None)
+    
     def update_portfolio(self, current_prices: Dict[str, float]):
         """Update portfolio with current prices"""
         try:
-            total_value = Decimal('0')
-            total_pnl = Decimal('0')
-            
-            for position in self.positions.values():
-                if position.status != "open":
+            # Only positions on pairs with a new price are touched
+            for price_key, price in current_prices.items():
+                base_currency, _, quote_currency = price_key.partition('_')
+                pair_positions = self._pair_index.get((base_currency, quote_currency))
+                if not pair_positions:
                     continue
                 
-                # Update current price
-                price_key = f"{position.base_currency}_{position.quote_currency}"
-                if price_key in current_prices:
-                    position.current_price = Decimal(str(current_prices[price_key]))
+                current_price_f = float(price)
+                for position in pair_positions.values():
+                    entry_price_f = position._entry_price_f
+                    amount_f = position._amount_f
                     
-                    # Calculate PnL
+                    # Calculate PnL in floats; Decimals are materialized on report
                     if position.side == OrderSide.BUY:
-                        position.pnl = (position.current_price - position.entry_price) * position.amount
+                        pnl_f = (current_price_f - entry_price_f) * amount_f
                     else:
-                        position.pnl = (position.entry_price - position.current_price) * position.amount
+                        pnl_f = (entry_price_f - current_price_f) * amount_f
                     
-                    position.pnl_percentage = float(position.pnl / (position.entry_price * position.amount) * 100)
+                    # Apply deltas to the running totals
+                    self._total_value_f += (current_price_f - position._current_price_f) * amount_f
+                    self._total_pnl_f += pnl_f - position._pnl_f
                     
-                    # Add to totals
-                    position_value = position.current_price * position.amount
-                    total_value += position_value
-                    total_pnl += position.pnl
+                    position._current_price_f = current_price_f
+                    position._pnl_f = pnl_f
+                    cost_f = entry_price_f * amount_f
+                    position.pnl_percentage = pnl_f / cost_f * 100.0 if cost_f else 0.0
+            
+            total_value_f = self._total_value_f
+            total_pnl_f = self._total_pnl_f
+            
+            now = time.time()
+            open_count = len(self._open_positions)
+            
+            # Unchanged state only refreshes the latest snapshot's timestamp
+            snapshot_key = (total_value_f, total_pnl_f, open_count)
+            if snapshot_key == self._last_snapshot_key and self.portfolio_history:
+                self.portfolio_history[-1].timestamp = now
+                self._snapshot_ts[-1] = now
+                return
+            self._last_snapshot_key = snapshot_key
             
             # Store portfolio snapshot
-            portfolio_snapshot = {
-                'timestamp': time.time(),
-                'total_value': float(total_value),
-                'total_pnl': float(total_pnl),
-                'positions_count': len([p for p in self.positions.values() if p.status == "open"])
-            }
+            portfolio_snapshot = PortfolioSnapshot(
+                timestamp=now,
+                total_value=total_value_f,
+                total_pnl=total_pnl_f,
+                positions_count=open_count
+            )
             
             self.portfolio_history.append(portfolio_snapshot)
+            self._snapshot_values.append(portfolio_snapshot.total_value)
+            self._snapshot_ts.append(portfolio_snapshot.timestamp)
             
-            # Keep only last 1000 snapshots
-            if len(self.portfolio_history) > 1000:
-                self.portfolio_history = self.portfolio_history[-1000:]
+            # Track max drawdown as a streaming statistic
+            if total_value_f > self._peak_value:
+                self._peak_value = total_value_f
+            elif self._peak_value > 0:
+                drawdown = (self._peak_value - total_value_f) / self._peak_value
+                if drawdown > self._max_drawdown:
+                    self._max_drawdown = drawdown
             
         except Exception as e:
             logger.error(f"Failed to update portfolio: {e}")
@@ -863,60 +1114,51 @@ class AITradingEngine:
             
             # Current values
             current_snapshot = self.portfolio_history[-1]
-            total_value = Decimal(str(current_snapshot['total_value']))
-            total_pnl = Decimal(str(current_snapshot['total_pnl']))
+            total_value_f = current_snapshot.total_value
+            total_pnl_f = current_snapshot.total_pnl
             
-            # Calculate daily PnL
+            # Calculate daily PnL (snapshots are appended in timestamp order)
             one_day_ago = time.time() - 86400
-            daily_snapshots = [s for s in self.portfolio_history if s['timestamp'] >= one_day_ago]
+            first_daily = bisect.bisect_left(self._snapshot_ts, one_day_ago)
             
-            if len(daily_snapshots) >= 2:
-                daily_pnl = Decimal(str(daily_snapshots[-1]['total_pnl'])) - Decimal(str(daily_snapshots[0]['total_pnl']))
-                daily_pnl_percentage = float(daily_pnl / total_value * 100) if total_value > 0 else 0.0
+            if len(self.portfolio_history) - first_daily >= 2:
+                daily_pnl_f = total_pnl_f - self.portfolio_history[first_daily].total_pnl
+                daily_pnl_percentage = daily_pnl_f / total_value_f * 100.0 if total_value_f > 0 else 0.0
             else:
-                daily_pnl = Decimal('0')
+                daily_pnl_f = 0.0
                 daily_pnl_percentage = 0.0
             
+            values = np.fromiter(self._snapshot_values, dtype=np.float64, count=len(self._snapshot_values))
+            
             # Calculate Sharpe ratio (simplified)
-            if len(self.portfolio_history) > 1:
-                returns = []
-                for i in range(1, len(self.portfolio_history)):
-                    prev_value = self.portfolio_history[i-1]['total_value']
-                    curr_value = self.portfolio_history[i]['total_value']
-                    if prev_value > 0:
-                        returns.append((curr_value - prev_value) / prev_value)
-                
-                if returns:
-                    avg_return = np.mean(returns)
-                    std_return = np.std(returns)
+            sharpe_ratio = 0.0
+            if len(values) > 1:
+                if NUMBA_AVAILABLE:
+                    avg_return, std_return, _ = _return_stats(values)
                     sharpe_ratio = avg_return / std_return if std_return > 0 else 0.0
                 else:
-                    sharpe_ratio = 0.0
-            else:
-                sharpe_ratio = 0.0
-            
-            # Calculate max drawdown
-            max_drawdown = 0.0
-            if len(self.portfolio_history) > 1:
-                peak = self.portfolio_history[0]['total_value']
-                for snapshot in self.portfolio_history:
-                    if snapshot['total_value'] > peak:
-                        peak = snapshot['total_value']
-                    else:
-                        drawdown = (peak - snapshot['total_value']) / peak
-                        max_drawdown = max(max_drawdown, drawdown)
+                    prev_values = values[:-1]
+                    valid = prev_values > 0
+                    returns = np.diff(values)[valid] / prev_values[valid]
+                    
+                    if len(returns):
+                        std_return = returns.std(ddof=0)
+                        sharpe_ratio = float(returns.mean() / std_return) if std_return > 0 else 0.0
+            
+            # Max drawdown is maintained incrementally by update_portfolio
+            max_drawdown = self._max_drawdown
             
             # Calculate win rate
-            closed_positions = [p for p in self.positions.values() if p.status == "closed"]
+            closed_positions = self._closed_positions.values()
             total_trades = len(closed_positions)
             profitable_trades = len([p for p in closed_positions if p.pnl > 0])
             win_rate = profitable_trades / total_trades if total_trades > 0 else 0.0
             
             return PortfolioMetrics(
-                total_value=total_value,
-                total_pnl=total_pnl,
-                total_pnl_percentage=float(total_pnl / total_value * 100) if total_value > 0 else 0.0,
-                daily_pnl=daily_pnl,
+                total_value=Decimal(repr(total_value_f)),
+                total_pnl=Decimal(repr(total_pnl_f)),
+                total_pnl_percentage=total_pnl_f / total_value_f * 100.0 if total_value_f > 0 else 0.0,
+                daily_pnl=Decimal(repr(daily_pnl_f)),
                 daily_pnl_percentage=daily_pnl_percentage,
                 sharpe_ratio=sharpe_ratio,
                 max_drawdown=max_drawdown,
@@ -946,8 +1188,11 @@ class AITradingEngine:
     
     def get_open_positions(self) -> List[TradingPosition]:
         """Get all open positions"""
-        return [p for p in self.positions.values() if p.status == "open"]
+        positions = list(self._open_positions.values())
+        for position in positions:
+            position.sync_decimals()
+        return positions
     
     def get_closed_positions(self) -> List[TradingPosition]:
         """Get all closed positions"""
-        return [p for p in self.positions.values() if p.status == "closed"]
+        return list(self._closed_positions.values())
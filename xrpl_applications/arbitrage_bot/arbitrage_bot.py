@@ -5,12 +5,13 @@ Automated cross-exchange price arbitrage for XRP and other tokens
 """
 
 import asyncio
-import json
+import functools
 import logging
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import aiohttp
+import orjson
 import websockets
 from dataclasses import dataclass
 from decimal import Decimal
@@ -30,7 +31,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Prepared ticker requests; pure functions of (base_url, symbol) so they
+# can be cached at module level rather than on bound methods
+@functools.cache
+def _binance_price_request(base_url: str, symbol: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return f"{base_url}/api/v3/ticker/price", (('symbol', symbol),)
+
+# Coinbase quotes stablecoin pairs in USD and wants dashed product ids
+_COINBASE_QUOTES = (("USDT", "USD"), ("USDC", "USD"), ("USD", "USD"), ("EUR", "EUR"), ("BTC", "BTC"), ("ETH", "ETH"))
+
+@functools.cache
+def _coinbase_product_id(symbol: str) -> str:
+    for suffix, quote in _COINBASE_QUOTES:
+        if symbol.endswith(suffix) and len(symbol) > len(suffix):
+            return f"{symbol[:-len(suffix)]}-{quote}"
+    return symbol
+
+@functools.cache
+def _coinbase_price_url(base_url: str, symbol: str) -> str:
+    # Same product id as the stream subscribes to, so REST and WebSocket agree
+    return f"{base_url}/products/{_coinbase_product_id(symbol)}/ticker"
+
+# Reconnect backoff for price streams (seconds)
+_STREAM_BACKOFF_MIN = 1
+_STREAM_BACKOFF_MAX = 60
+
+@functools.cache
+def _kraken_price_request(base_url: str, symbol: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return f"{base_url}/0/public/Ticker", (('pair', symbol),)
+
+@dataclass(slots=True)
 class ArbitrageOpportunity:
     """Represents an arbitrage opportunity"""
     token: str
@@ -43,7 +73,7 @@ class ArbitrageOpportunity:
     volume: Decimal
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True)
 class ExchangeConfig:
     """Exchange configuration"""
     name: str
@@ -62,21 +92,36 @@ class XRPLArbitrageBot:
     def __init__(self, config_file: str = "config.json"):
         self.config = self.load_config(config_file)
         self.exchanges = self.setup_exchanges()
+        self.setup_dispatch()
+        self.setup_request_templates()
+        
+        # Per-exchange cap on concurrent REST requests
+        self._limiters: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(int(self.config.get(f'{name}_concurrency', 4)))
+            for name in self.exchanges
+        }
         self.opportunities: List[ArbitrageOpportunity] = []
         self.running = False
         self.balance_cache: Dict[str, Dict[str, Decimal]] = {}
         self.price_cache: Dict[str, Dict[str, Decimal]] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._hmac_templates: Dict[str, hmac.HMAC] = {}
+        self._kraken_pairs: Dict[str, str] = {}
+        self._price_times: Dict[Tuple[str, str], float] = {}
+        self._stream_tasks: List[asyncio.Task] = []
+        self.symbols: List[str] = self.config.get('trading_pairs', ['XRPUSDT', 'XRPBTC', 'XRPETH'])
         
         # Arbitrage parameters
         self.min_profit_threshold = Decimal(self.config.get('min_profit_threshold', '0.5'))  # 0.5%
         self.max_position_size = Decimal(self.config.get('max_position_size', '1000'))  # 1000 XRP
         self.gas_price_buffer = Decimal(self.config.get('gas_price_buffer', '1.2'))  # 20% buffer
+        self.price_max_age = float(self.config.get('price_max_age', 10))  # seconds before REST fallback
         
     def load_config(self, config_file: str) -> Dict:
         """Load configuration from file"""
         try:
-            with open(config_file, 'r') as f:
-                return json.load(f)
+            with open(config_file, 'rb') as f:
+                return orjson.loads(f.read())
         except FileNotFoundError:
             logger.error(f"Config file {config_file} not found")
             return {}
@@ -129,113 +174,281 @@ class XRPLArbitrageBot:
         
         return exchanges
     
+    def setup_dispatch(self):
+        """Setup per-exchange API method tables"""
+        self._price_fns = {
+            'binance': self.get_binance_price,
+            'coinbase': self.get_coinbase_price,
+            'kraken': self.get_kraken_price
+        }
+        self._balance_fns = {
+            'binance': self.get_binance_balance,
+            'coinbase': self.get_coinbase_balance,
+            'kraken': self.get_kraken_balance
+        }
+        self._buy_fns = {
+            'binance': self.execute_binance_buy_order,
+            'coinbase': self.execute_coinbase_buy_order,
+            'kraken': self.execute_kraken_buy_order
+        }
+        self._sell_fns = {
+            'binance': self.execute_binance_sell_order,
+            'coinbase': self.execute_coinbase_sell_order,
+            'kraken': self.execute_kraken_sell_order
+        }
+    
+    def setup_request_templates(self):
+        """Preassemble constant account URLs and headers per exchange"""
+        self._account_urls: Dict[str, str] = {}
+        self._account_headers: Dict[str, Dict[str, str]] = {}
+        
+        if 'binance' in self.exchanges:
+            binance = self.exchanges['binance']
+            self._account_urls['binance'] = f"{binance.base_url}/api/v3/account"
+            self._account_headers['binance'] = {'X-MBX-APIKEY': binance.api_key}
+        
+        if 'coinbase' in self.exchanges:
+            passphrase = self.config['coinbase'].get('passphrase')
+            if not passphrase:
+                # A blank passphrase would only surface later as opaque 401s
+                logger.error("Coinbase passphrase not configured; skipping Coinbase account requests")
+            else:
+                coinbase = self.exchanges['coinbase']
+                self._account_urls['coinbase'] = f"{coinbase.base_url}/accounts"
+                self._account_headers['coinbase'] = {
+                    'CB-ACCESS-KEY': coinbase.api_key,
+                    'CB-ACCESS-PASSPHRASE': passphrase
+                }
+    
+    async def _session(self, exchange: str) -> aiohttp.ClientSession:
+        """Get the long-lived HTTP session for an exchange"""
+        session = self._sessions.get(exchange)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+            self._sessions[exchange] = session
+        return session
+    
+    async def close(self):
+        """Stop price streams and close all exchange HTTP sessions"""
+        for task in self._stream_tasks:
+            task.cancel()
+        await asyncio.gather(*self._stream_tasks, return_exceptions=True)
+        self._stream_tasks = []
+        
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+    
     async def get_price(self, exchange: str, symbol: str) -> Optional[Decimal]:
         """Get current price from exchange"""
+        # Prefer the streamed price; fall back to REST when it is stale
+        updated_at = self._price_times.get((exchange, symbol))
+        if updated_at is not None and time.monotonic() - updated_at <= self.price_max_age:
+            return self.price_cache[exchange][symbol]
+        
+        price_fn = self._price_fns.get(exchange)
+        if price_fn is None:
+            return None
         try:
-            if exchange == 'binance':
-                return await self.get_binance_price(symbol)
-            elif exchange == 'coinbase':
-                return await self.get_coinbase_price(symbol)
-            elif exchange == 'kraken':
-                return await self.get_kraken_price(symbol)
+            price = await price_fn(symbol)
+            self._cache_price(exchange, symbol, price)
+            return price
         except Exception as e:
             logger.error(f"Error getting price from {exchange}: {e}")
             return None
     
     async def get_binance_price(self, symbol: str) -> Decimal:
         """Get price from Binance"""
-        url = f"{self.exchanges['binance'].base_url}/api/v3/ticker/price"
-        params = {'symbol': symbol}
+        url, params = _binance_price_request(self.exchanges['binance'].base_url, symbol)
         
-        async with aiohttp.ClientSession() as session:
+        session = await self._session('binance')
+        async with self._limiters['binance']:
             async with session.get(url, params=params) as response:
-                data = await response.json()
-                return Decimal(data['price'])
+                data = orjson.loads(await response.read())
+        return Decimal(data['price'])
     
     async def get_coinbase_price(self, symbol: str) -> Decimal:
         """Get price from Coinbase"""
-        url = f"{self.exchanges['coinbase'].base_url}/products/{symbol}/ticker"
+        url = _coinbase_price_url(self.exchanges['coinbase'].base_url, symbol)
         
-        async with aiohttp.ClientSession() as session:
+        session = await self._session('coinbase')
+        async with self._limiters['coinbase']:
             async with session.get(url) as response:
-                data = await response.json()
-                return Decimal(data['price'])
+                data = orjson.loads(await response.read())
+        return Decimal(data['price'])
     
     async def get_kraken_price(self, symbol: str) -> Decimal:
         """Get price from Kraken"""
-        url = f"{self.exchanges['kraken'].base_url}/0/public/Ticker"
-        params = {'pair': symbol}
+        url, params = _kraken_price_request(self.exchanges['kraken'].base_url, symbol)
         
-        async with aiohttp.ClientSession() as session:
+        session = await self._session('kraken')
+        async with self._limiters['kraken']:
             async with session.get(url, params=params) as response:
-                data = await response.json()
-                # Kraken returns data in a different format
-                pair_data = data['result'][list(data['result'].keys())[0]]
-                return Decimal(pair_data['c'][0])  # Current price
+                data = orjson.loads(await response.read())
+        # Kraken returns data keyed by its canonical pair name; resolve it once per symbol
+        result = data['result']
+        pair_name = self._kraken_pairs.get(symbol)
+        if pair_name is None or pair_name not in result:
+            pair_name = next(iter(result))
+            self._kraken_pairs[symbol] = pair_name
+        return Decimal(result[pair_name]['c'][0])  # Current price
+    
+    def _sign(self, exchange: str, message: bytes) -> str:
+        """HMAC-SHA256 sign a request message with the exchange secret"""
+        # The keyed template is built once; copy() reuses its padded key state
+        template = self._hmac_templates.get(exchange)
+        if template is None:
+            template = hmac.new(self.exchanges[exchange].secret_key.encode(), digestmod=hashlib.sha256)
+            self._hmac_templates[exchange] = template
+        h = template.copy()
+        h.update(message)
+        return h.hexdigest()
+    
+    def _cache_price(self, exchange: str, symbol: str, price: Decimal):
+        """Store the latest price for an exchange symbol"""
+        self.price_cache.setdefault(exchange, {})[symbol] = price
+        self._price_times[(exchange, symbol)] = time.monotonic()
+    
+    def start_price_streams(self):
+        """Start WebSocket ticker streams for all configured exchanges"""
+        streams = {
+            'binance': self._stream_binance,
+            'coinbase': self._stream_coinbase,
+            'kraken': self._stream_kraken
+        }
+        for exchange_name in self.exchanges:
+            stream_fn = streams.get(exchange_name)
+            if stream_fn is not None:
+                self._stream_tasks.append(asyncio.create_task(stream_fn()))
+    
+    async def _run_stream(self, exchange: str, url: str, subscribe: Dict, parse):
+        """Consume a ticker stream into the price cache, reconnecting with backoff"""
+        delay = _STREAM_BACKOFF_MIN
+        while self.running:
+            try:
+                async with websockets.connect(url) as ws:
+                    await ws.send(orjson.dumps(subscribe).decode())
+                    async for raw in ws:
+                        update = parse(orjson.loads(raw))
+                        if update is not None:
+                            symbol, price = update
+                            self._cache_price(exchange, symbol, price)
+                            delay = _STREAM_BACKOFF_MIN
+                logger.warning(f"Price stream on {exchange} closed, reconnecting in {delay}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Price stream error on {exchange}: {e}")
+            
+            # Same capped exponential backoff after a clean close or an error
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _STREAM_BACKOFF_MAX)
+    
+    async def _stream_binance(self):
+        """Stream ticker prices from Binance"""
+        subscribe = {
+            'method': 'SUBSCRIBE',
+            'params': [f"{symbol.lower()}@ticker" for symbol in self.symbols],
+            'id': 1
+        }
+        
+        def parse(msg):
+            if isinstance(msg, dict) and msg.get('e') == '24hrTicker':
+                return msg['s'], Decimal(msg['c'])
+            return None
+        
+        await self._run_stream('binance', self.exchanges['binance'].websocket_url, subscribe, parse)
+    
+    async def _stream_coinbase(self):
+        """Stream ticker prices from Coinbase"""
+        # Subscribe with Coinbase product ids but cache under our own symbols
+        symbols_by_product = {_coinbase_product_id(symbol): symbol for symbol in self.symbols}
+        subscribe = {
+            'type': 'subscribe',
+            'product_ids': list(symbols_by_product),
+            'channels': ['ticker']
+        }
+        
+        def parse(msg):
+            if isinstance(msg, dict) and msg.get('type') == 'ticker':
+                symbol = symbols_by_product.get(msg.get('product_id'))
+                if symbol is not None:
+                    return symbol, Decimal(msg['price'])
+            return None
+        
+        await self._run_stream('coinbase', self.exchanges['coinbase'].websocket_url, subscribe, parse)
+    
+    async def _stream_kraken(self):
+        """Stream ticker prices from Kraken"""
+        # Kraken WebSocket pairs are slash-separated (XRP/USDT)
+        subscribe = {
+            'event': 'subscribe',
+            'pair': [f"{symbol[:3]}/{symbol[3:]}" for symbol in self.symbols],
+            'subscription': {'name': 'ticker'}
+        }
+        
+        def parse(msg):
+            if isinstance(msg, list) and len(msg) >= 4 and msg[-2] == 'ticker':
+                return msg[-1].replace('/', ''), Decimal(msg[1]['c'][0])
+            return None
+        
+        await self._run_stream('kraken', self.exchanges['kraken'].websocket_url, subscribe, parse)
     
     async def get_balance(self, exchange: str, asset: str) -> Decimal:
         """Get balance from exchange"""
+        balance_fn = self._balance_fns.get(exchange)
+        if balance_fn is None:
+            return Decimal('0')
         try:
-            if exchange == 'binance':
-                return await self.get_binance_balance(asset)
-            elif exchange == 'coinbase':
-                return await self.get_coinbase_balance(asset)
-            elif exchange == 'kraken':
-                return await self.get_kraken_balance(asset)
+            return await balance_fn(asset)
         except Exception as e:
             logger.error(f"Error getting balance from {exchange}: {e}")
             return Decimal('0')
     
     async def get_binance_balance(self, asset: str) -> Decimal:
         """Get balance from Binance"""
-        timestamp = int(time.time() * 1000)
-        query_string = f"timestamp={timestamp}"
-        signature = hmac.new(
-            self.exchanges['binance'].secret_key.encode(),
-            query_string.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        url = f"{self.exchanges['binance'].base_url}/api/v3/account"
+        timestamp = str(int(time.time() * 1000))
+        signature = self._sign('binance', b'timestamp=' + timestamp.encode())
+        
         params = {
             'timestamp': timestamp,
             'signature': signature
         }
         
-        headers = {'X-MBX-APIKEY': self.exchanges['binance'].api_key}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, headers=headers) as response:
-                data = await response.json()
-                for balance in data['balances']:
-                    if balance['asset'] == asset:
-                        return Decimal(balance['free'])
-                return Decimal('0')
+        session = await self._session('binance')
+        async with self._limiters['binance']:
+            async with session.get(self._account_urls['binance'], params=params,
+                                   headers=self._account_headers['binance']) as response:
+                data = orjson.loads(await response.read())
+        for balance in data['balances']:
+            if balance['asset'] == asset:
+                return Decimal(balance['free'])
+        return Decimal('0')
     
     async def get_coinbase_balance(self, asset: str) -> Decimal:
         """Get balance from Coinbase"""
+        template = self._account_headers.get('coinbase')
+        if template is None:
+            raise ValueError("Coinbase passphrase not configured")
+        
         timestamp = str(int(time.time()))
-        message = timestamp + 'GET' + '/accounts'
-        signature = hmac.new(
-            self.exchanges['coinbase'].secret_key.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        headers = {
-            'CB-ACCESS-KEY': self.exchanges['coinbase'].api_key,
-            'CB-ACCESS-SIGN': signature,
-            'CB-ACCESS-TIMESTAMP': timestamp,
-            'CB-ACCESS-PASS PHRASE': self.config['coinbase']['passphrase']
-        }
+        signature = self._sign('coinbase', timestamp.encode() + b'GET/accounts')
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.exchanges['coinbase'].base_url}/accounts", headers=headers) as response:
-                data = await response.json()
-                for account in data:
-                    if account['currency'] == asset:
-                        return Decimal(account['available'])
-                return Decimal('0')
+        headers = dict(template)
+        headers['CB-ACCESS-SIGN'] = signature
+        headers['CB-ACCESS-TIMESTAMP'] = timestamp
+        
+        session = await self._session('coinbase')
+        async with self._limiters['coinbase']:
+            async with session.get(self._account_urls['coinbase'], headers=headers) as response:
+                data = orjson.loads(await response.read())
+        for account in data:
+            if account['currency'] == asset:
+                return Decimal(account['available'])
+        return Decimal('0')
     
     async def get_kraken_balance(self, asset: str) -> Decimal:
         """Get balance from Kraken"""
@@ -246,41 +459,45 @@ class XRPLArbitrageBot:
     async def find_arbitrage_opportunities(self) -> List[ArbitrageOpportunity]:
         """Find arbitrage opportunities across exchanges"""
         opportunities = []
-        symbols = ['XRPUSDT', 'XRPBTC', 'XRPETH']
+        symbols = self.symbols
         
-        for symbol in symbols:
-            prices = {}
-            
-            # Get prices from all exchanges
-            for exchange_name in self.exchanges.keys():
-                price = await self.get_price(exchange_name, symbol)
-                if price:
-                    prices[exchange_name] = price
-            
-            # Find arbitrage opportunities
+        # Get prices from all exchanges concurrently
+        pairs = [(symbol, exchange_name) for symbol in symbols for exchange_name in self.exchanges]
+        results = await asyncio.gather(
+            *(self.get_price(exchange_name, symbol) for symbol, exchange_name in pairs),
+            return_exceptions=True
+        )
+        
+        prices_by_symbol: Dict[str, Dict[str, Decimal]] = {symbol: {} for symbol in symbols}
+        for (symbol, exchange_name), price in zip(pairs, results):
+            if isinstance(price, Exception):
+                logger.error(f"Error getting price from {exchange_name}: {price}")
+            elif price:
+                prices_by_symbol[symbol][exchange_name] = price
+        
+        for symbol, prices in prices_by_symbol.items():
+            # Find arbitrage opportunities: only the cheapest buy against the
+            # most expensive sell can beat every other exchange pair
             if len(prices) >= 2:
-                sorted_prices = sorted(prices.items(), key=lambda x: x[1])
+                buy_exchange, buy_price = min(prices.items(), key=lambda x: x[1])
+                sell_exchange, sell_price = max(prices.items(), key=lambda x: x[1])
                 
-                for i in range(len(sorted_prices)):
-                    for j in range(i + 1, len(sorted_prices)):
-                        buy_exchange, buy_price = sorted_prices[i]
-                        sell_exchange, sell_price = sorted_prices[j]
-                        
-                        profit_percentage = ((sell_price - buy_price) / buy_price) * 100
-                        
-                        if profit_percentage > self.min_profit_threshold:
-                            opportunity = ArbitrageOpportunity(
-                                token=symbol,
-                                buy_exchange=buy_exchange,
-                                sell_exchange=sell_exchange,
-                                buy_price=buy_price,
-                                sell_price=sell_price,
-                                profit_percentage=profit_percentage,
-                                min_profit_threshold=self.min_profit_threshold,
-                                volume=Decimal('0'),  # Will be calculated based on balance
-                                timestamp=datetime.now()
-                            )
-                            opportunities.append(opportunity)
+                if buy_exchange != sell_exchange:
+                    profit_percentage = ((sell_price - buy_price) / buy_price) * 100
+                    
+                    if profit_percentage > self.min_profit_threshold:
+                        opportunity = ArbitrageOpportunity(
+                            token=symbol,
+                            buy_exchange=buy_exchange,
+                            sell_exchange=sell_exchange,
+                            buy_price=buy_price,
+                            sell_price=sell_price,
+                            profit_percentage=profit_percentage,
+                            min_profit_threshold=self.min_profit_threshold,
+                            volume=Decimal('0'),  # Will be calculated based on balance
+                            timestamp=datetime.now()
+                        )
+                        opportunities.append(opportunity)
         
         return opportunities
     
@@ -332,41 +549,37 @@ class XRPLArbitrageBot:
     def calculate_optimal_trade_size(self, opportunity: ArbitrageOpportunity) -> Decimal:
         """Calculate optimal trade size based on available balance and risk"""
         # Get available balance from buy exchange
-        available_balance = self.balance_cache.get(opportunity.buy_exchange, {}).get('USDT', Decimal('0'))
+        available_balance = float(self.balance_cache.get(opportunity.buy_exchange, {}).get('USDT', 0))
         
         # Calculate maximum trade size based on balance
-        max_trade_by_balance = available_balance / opportunity.buy_price
+        max_trade_by_balance = available_balance / float(opportunity.buy_price)
         
         # Apply position size limits
-        max_trade_by_position = self.max_position_size
+        max_trade_by_position = float(self.max_position_size)
         
         # Use the smaller of the two
         optimal_size = min(max_trade_by_balance, max_trade_by_position)
         
-        return optimal_size
+        return Decimal(repr(optimal_size))
     
     async def execute_buy_order(self, exchange: str, symbol: str, amount: Decimal) -> bool:
         """Execute buy order on exchange"""
+        buy_fn = self._buy_fns.get(exchange)
+        if buy_fn is None:
+            return False
         try:
-            if exchange == 'binance':
-                return await self.execute_binance_buy_order(symbol, amount)
-            elif exchange == 'coinbase':
-                return await self.execute_coinbase_buy_order(symbol, amount)
-            elif exchange == 'kraken':
-                return await self.execute_kraken_buy_order(symbol, amount)
+            return await buy_fn(symbol, amount)
         except Exception as e:
             logger.error(f"Error executing buy order on {exchange}: {e}")
             return False
     
     async def execute_sell_order(self, exchange: str, symbol: str, amount: Decimal) -> bool:
         """Execute sell order on exchange"""
+        sell_fn = self._sell_fns.get(exchange)
+        if sell_fn is None:
+            return False
         try:
-            if exchange == 'binance':
-                return await self.execute_binance_sell_order(symbol, amount)
-            elif exchange == 'coinbase':
-                return await self.execute_coinbase_sell_order(symbol, amount)
-            elif exchange == 'kraken':
-                return await self.execute_kraken_sell_order(symbol, amount)
+            return await sell_fn(symbol, amount)
         except Exception as e:
             logger.error(f"Error executing sell order on {exchange}: {e}")
             return False
@@ -415,38 +628,52 @@ class XRPLArbitrageBot:
     
     async def update_balances(self):
         """Update balance cache"""
-        for exchange_name in self.exchanges.keys():
+        assets = ['XRP', 'USDT', 'BTC', 'ETH']
+        pairs = [(exchange_name, asset) for exchange_name in self.exchanges for asset in assets]
+        results = await asyncio.gather(
+            *(self.get_balance(exchange_name, asset) for exchange_name, asset in pairs),
+            return_exceptions=True
+        )
+        
+        for exchange_name in self.exchanges:
             self.balance_cache[exchange_name] = {}
-            for asset in ['XRP', 'USDT', 'BTC', 'ETH']:
-                balance = await self.get_balance(exchange_name, asset)
-                self.balance_cache[exchange_name][asset] = balance
+        for (exchange_name, asset), balance in zip(pairs, results):
+            if isinstance(balance, Exception):
+                logger.error(f"Error getting balance from {exchange_name}: {balance}")
+                balance = Decimal('0')
+            self.balance_cache[exchange_name][asset] = balance
     
     async def run(self):
         """Main bot loop"""
         logger.info("Starting XRPL Arbitrage Bot...")
         self.running = True
+        self.start_price_streams()
         
-        while self.running:
-            try:
-                # Update balances
-                await self.update_balances()
-                
-                # Find arbitrage opportunities
-                opportunities = await self.find_arbitrage_opportunities()
-                
-                # Execute profitable opportunities
-                for opportunity in opportunities:
-                    if opportunity.profit_percentage > self.min_profit_threshold:
-                        success = await self.execute_arbitrage(opportunity)
-                        if success:
-                            logger.info(f"Arbitrage executed successfully: {opportunity.profit_percentage:.2f}% profit")
-                
-                # Wait before next iteration
-                await asyncio.sleep(5)  # 5 second intervals
-                
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                await asyncio.sleep(10)  # Wait longer on error
+        try:
+            while self.running:
+                try:
+                    # Update balances
+                    await self.update_balances()
+                    
+                    # Find arbitrage opportunities
+                    opportunities = await self.find_arbitrage_opportunities()
+                    
+                    # Execute profitable opportunities
+                    for opportunity in opportunities:
+                        if opportunity.profit_percentage > self.min_profit_threshold:
+                            success = await self.execute_arbitrage(opportunity)
+                            if success:
+                                logger.info(f"Arbitrage executed successfully: {opportunity.profit_percentage:.2f}% profit")
+                    
+                    # Wait before next iteration
+                    await asyncio.sleep(5)  # 5 second intervals
+                    
+                except Exception as e:
+                    logger.error(f"Error in main loop: {e}")
+                    await asyncio.sleep(10)  # Wait longer on error
+        finally:
+            # Sessions are released once the loop exits after stop()
+            await self.close()
     
     def stop(self):
         """Stop the bot"""
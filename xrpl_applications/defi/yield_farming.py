@@ -5,23 +5,62 @@ Fort Knox-level security with automatic flash loan arbitrage
 """
 
 import asyncio
+import bisect
 import logging
 import time
 import hashlib
 import hmac
-from typing import Dict, List, Optional, Any, Tuple, Union
+import heapq
+from array import array
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
 from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
 import json
 import secrets
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from core.xrpl_client import XRPLClient, XRPLAccount
 from dex.dex_engine import OrderBook, Order, OrderSide, OrderType
 from config import DEX_CONFIG, SecurityConfig
 
 logger = logging.getLogger(__name__)
 
+# Maximum actions per user within the rate-limit window
+_LIMITS = {"stake": 10, "flash_loan": 5}
+_RATE_LIMIT_WINDOW = 3600  # 1 hour
+
+# Float thresholds for heuristic pool checks (compared against float APY)
+_APY_MAX = 5.0  # 500% max
+_APY_HIGH = 1.0  # 100% APY is suspicious at low risk
+_RISK_THRESHOLD = 5
+
+# Shared Decimal constants for validation and fee math
+_ZERO = Decimal(0)
+_CONCENTRATION_FACTOR = Decimal(2)
+_FLASH_FEE_RATE = Decimal("0.001")  # 0.1% fee
+_LOAN_CAP = Decimal(1_000_000)  # 1M limit
+
+# Pool creation and audit whitelists
+_REQUIRED_FIELDS = frozenset({"name", "base_currency", "quote_currency", "strategy"})
+_VALID_CURRENCIES = frozenset({"XRP", "USDC", "USDT", "BTC", "ETH"})
+
+# Secure IDs are sliced from a pre-drawn entropy buffer
+_ID_BYTES = 16
+_ID_POOL_SIZE = _ID_BYTES * 1024
+
+def dumps_response(obj: Any) -> bytes:
+    """Serialize an API response (Decimals are pre-stringified) to JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
 class FarmingStrategy(Enum):
     """Yield farming strategies"""
     LIQUIDITY_PROVIDER = "liquidity_provider"
@@ -38,7 +77,7 @@ class FlashLoanStatus(Enum):
     FAILED = "failed"
     EXPIRED = "expired"
 
-@dataclass
+@dataclass(slots=True)
 class YieldPool:
     """Yield farming pool"""
     id: str
@@ -57,8 +96,25 @@ class YieldPool:
     created_at: float = field(default_factory=time.time)
     is_active: bool = True
     security_score: int = 100  # 0-100, 100 being most secure
+    
+    # Float copy of apy for heuristic checks; money math stays in Decimal
+    _apy_f: float = field(default=0.0, init=False, repr=False, compare=False)
+    
+    # Plain string copy of strategy.value for serialization
+    _strategy_value: str = field(default="", init=False, repr=False, compare=False)
+    
+    # Serialized pool info, rebuilt after liquidity/share/status changes
+    _cached_info: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._apy_f = float(self.apy)
+        self._strategy_value = self.strategy.value
+    
+    def _invalidate(self):
+        """Drop the cached pool info after a mutation"""
+        self._cached_info = None
 
-@dataclass
+@dataclass(slots=True)
 class UserPosition:
     """User's position in a yield pool"""
     id: str
@@ -72,7 +128,7 @@ class UserPosition:
     lock_until: float
     is_locked: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class FlashLoan:
     """Flash loan transaction"""
     id: str
@@ -98,13 +154,37 @@ class YieldFarmingEngine:
         self.flash_loans: Dict[str, FlashLoan] = {}
         self.order_books: Dict[str, OrderBook] = {}
         
+        # Per-user secondary indexes (user address -> ids)
+        self.positions_by_user: Dict[str, Set[str]] = defaultdict(set)
+        self.flash_loans_by_user: Dict[str, Set[str]] = defaultdict(set)
+        
+        # Strategy -> pool ids, so scanners only visit relevant pools
+        self._pools_by_strategy: Dict[FarmingStrategy, Set[str]] = defaultdict(set)
+        
+        # Column (SoA) mirrors of positions and flash loans for bulk scans
+        self._pos_user: List[str] = []
+        self._pos_pool: List[str] = []
+        self._pos_amount: List[Decimal] = []
+        self._pos_created: array = array('d')
+        self._pos_id_to_idx: Dict[str, int] = {}
+        self._loan_created: array = array('d')
+        self._loan_id_to_idx: Dict[str, int] = {}
+        
+        # Min-heap of (deadline, loan id) for expiry sweeps
+        self._loan_deadlines: List[Tuple[float, str]] = []
+        self._expiry_task: Optional[asyncio.Task] = None
+        
+        # Entropy pool for secure ID generation
+        self._id_pool = b''
+        self._id_cursor = 0
+        
         # Security features
         self.security_config = SecurityConfig()
-        self.rate_limits: Dict[str, Dict] = {}
-        self.suspicious_activities: List[Dict] = []
+        self.rate_limits: Dict[Tuple[str, str], deque] = {}
+        self.suspicious_activities: deque = deque(maxlen=10_000)
         
         # Flash loan arbitrage opportunities
-        self.arbitrage_opportunities: List[Dict] = []
+        self.arbitrage_opportunities: deque = deque(maxlen=1_000)
         
         # Initialize pools
         self._initialize_default_pools()
@@ -140,7 +220,7 @@ class YieldFarmingEngine:
                 "strategy": FarmingStrategy.FLASH_LOAN_ARBITRAGE,
                 "risk_level": 7,
                 "min_stake": Decimal('1000'),
-                "max_stake": Decimal('50000"),
+                "max_stake": Decimal('50000'),
                 "lock_period": 3600,  # 1 hour
                 "security_score": 90
             }
@@ -149,6 +229,7 @@ class YieldFarmingEngine:
         for pool_data in pools_data:
             pool = YieldPool(**pool_data)
             self.pools[pool.id] = pool
+            self._pools_by_strategy[pool.strategy].add(pool.id)
     
     async def create_pool(self, pool_data: Dict) -> Optional[str]:
         """Create a new yield farming pool with security validation"""
@@ -167,6 +248,7 @@ class YieldFarmingEngine:
                 return None
             
             self.pools[pool_id] = pool
+            self._pools_by_strategy[pool.strategy].add(pool_id)
             logger.info(f"Created yield pool: {pool_id}")
             return pool_id
             
@@ -176,12 +258,10 @@ class YieldFarmingEngine:
     
     def _validate_pool_creation(self, pool_data: Dict) -> bool:
         """Validate pool creation parameters with security checks"""
-        required_fields = ['name', 'base_currency', 'quote_currency', 'strategy']
-        
-        for field in required_fields:
-            if field not in pool_data:
-                logger.error(f"Missing required field: {field}")
-                return False
+        missing = _REQUIRED_FIELDS.difference(pool_data)
+        if missing:
+            logger.error(f"Missing required field: {', '.join(sorted(missing))}")
+            return False
         
         # Validate risk parameters
         if 'risk_level' in pool_data and not (1 <= pool_data['risk_level'] <= 10):
@@ -189,7 +269,7 @@ class YieldFarmingEngine:
             return False
         
         # Validate APY (reasonable limits)
-        if 'apy' in pool_data and pool_data['apy'] > Decimal('5.0'):  # 500% max
+        if 'apy' in pool_data and float(pool_data['apy']) > _APY_MAX:
             logger.error("APY too high, potential scam")
             return False
         
@@ -198,13 +278,12 @@ class YieldFarmingEngine:
     def _security_audit_pool(self, pool: YieldPool) -> bool:
         """Perform security audit on pool"""
         # Check for suspicious patterns
-        if pool.apy > Decimal('1.0') and pool.risk_level < 5:
+        if pool._apy_f > _APY_HIGH and pool.risk_level < _RISK_THRESHOLD:
             logger.warning("High APY with low risk - suspicious")
             return False
         
         # Validate currency pairs
-        valid_currencies = ['XRP', 'USDC', 'USDT', 'BTC', 'ETH']
-        if pool.base_currency not in valid_currencies or pool.quote_currency not in valid_currencies:
+        if pool.base_currency not in _VALID_CURRENCIES or pool.quote_currency not in _VALID_CURRENCIES:
             logger.warning("Unsupported currency pair")
             return False
         
@@ -214,7 +293,8 @@ class YieldFarmingEngine:
         """Stake tokens in a yield pool with security checks"""
         try:
             # Security validation
-            if not self._validate_stake_request(user_address, pool_id, amount):
+            pool = self._validate_stake_request(user_address, pool_id, amount)
+            if pool is None:
                 return False
             
             # Rate limiting
@@ -222,37 +302,11 @@ class YieldFarmingEngine:
                 logger.warning(f"Rate limit exceeded for user: {user_address}")
                 return False
             
-            pool = self.pools.get(pool_id)
-            if not pool or not pool.is_active:
+            if not pool.is_active:
                 logger.error("Invalid or inactive pool")
                 return False
             
-            # Calculate shares
-            if pool.total_liquidity == Decimal('0'):
-                shares = amount
-            else:
-                shares = (amount * pool.total_shares) / pool.total_liquidity
-            
-            # Create position
-            position_id = self._generate_secure_id()
-            position = UserPosition(
-                id=position_id,
-                user_address=user_address,
-                pool_id=pool_id,
-                staked_amount=amount,
-                shares=shares,
-                rewards_earned=Decimal('0'),
-                last_claim=time.time(),
-                staked_at=time.time(),
-                lock_until=time.time() + pool.lock_period,
-                is_locked=True
-            )
-            
-            self.user_positions[position_id] = position
-            
-            # Update pool
-            pool.total_liquidity += amount
-            pool.total_shares += shares
+            self._record_stake(user_address, pool, amount, time.time())
             
             logger.info(f"User {user_address} staked {amount} in pool {pool_id}")
             return True
@@ -261,27 +315,119 @@ class YieldFarmingEngine:
             logger.error(f"Staking failed: {e}")
             return False
     
-    def _validate_stake_request(self, user_address: str, pool_id: str, amount: Decimal) -> bool:
-        """Validate stake request with security checks"""
+    async def stake_tokens_batch(self, user_address: str, requests: List[Tuple[str, Decimal]]) -> List[bool]:
+        """Stake into several pools as one user action, all-or-nothing"""
+        if not requests:
+            return []
+        
+        failed = [False] * len(requests)
+        try:
+            # Validate every request before writing anything
+            pools = []
+            pending = _ZERO
+            for pool_id, amount in requests:
+                pool = self._validate_stake_request(user_address, pool_id, amount, pending)
+                if pool is None or not pool.is_active:
+                    logger.error(f"Batch stake rejected at pool: {pool_id}")
+                    return failed
+                pools.append(pool)
+                pending += amount
+            
+            # Stage every position against running pool totals; nothing is written yet
+            now = time.time()
+            staged_totals: Dict[str, Tuple[Decimal, Decimal]] = {}
+            positions = []
+            for (pool_id, amount), pool in zip(requests, pools):
+                total_shares, total_liquidity = staged_totals.get(pool.id, (pool.total_shares, pool.total_liquidity))
+                position = self._prepare_stake(user_address, pool, amount, now, total_shares, total_liquidity)
+                staged_totals[pool.id] = (total_shares + position.shares, total_liquidity + amount)
+                positions.append(position)
+            
+            # Each request in the batch consumes its own rate-limit token
+            if not self._check_rate_limit(user_address, "stake", len(requests)):
+                logger.warning(f"Rate limit exceeded for user: {user_address}")
+                return failed
+            
+            for pool, position in zip(pools, positions):
+                self._apply_stake(pool, position)
+            
+            logger.info(f"User {user_address} staked {pending} across {len(requests)} pools")
+            return [True] * len(requests)
+            
+        except Exception as e:
+            logger.error(f"Batch staking failed: {e}")
+            return failed
+    
+    def _record_stake(self, user_address: str, pool: YieldPool, amount: Decimal, now: float) -> UserPosition:
+        """Create a position and apply it to the pool and indexes"""
+        position = self._prepare_stake(user_address, pool, amount, now, pool.total_shares, pool.total_liquidity)
+        self._apply_stake(pool, position)
+        return position
+    
+    def _prepare_stake(self, user_address: str, pool: YieldPool, amount: Decimal, now: float,
+                       total_shares: Decimal, total_liquidity: Decimal) -> UserPosition:
+        """Build a position against the given pool totals without touching any state"""
+        # Calculate shares; a 1:1 pool needs no Decimal division
+        if total_liquidity == _ZERO or total_shares == total_liquidity:
+            shares = amount
+        else:
+            shares = (amount * total_shares) / total_liquidity
+        
+        return UserPosition(
+            id=self._generate_secure_id(),
+            user_address=user_address,
+            pool_id=pool.id,
+            staked_amount=amount,
+            shares=shares,
+            rewards_earned=_ZERO,
+            last_claim=now,
+            staked_at=now,
+            lock_until=now + pool.lock_period,
+            is_locked=True
+        )
+    
+    def _apply_stake(self, pool: YieldPool, position: UserPosition):
+        """Apply a prepared position to the pool, indexes and columns"""
+        position_id = position.id
+        self.user_positions[position_id] = position
+        self.positions_by_user[position.user_address].add(position_id)
+        self._pos_id_to_idx[position_id] = len(self._pos_user)
+        self._pos_user.append(position.user_address)
+        self._pos_pool.append(pool.id)
+        self._pos_amount.append(position.staked_amount)
+        self._pos_created.append(position.staked_at)
+        
+        # Update pool
+        pool.total_liquidity += position.staked_amount
+        pool.total_shares += position.shares
+        pool._invalidate()
+    
+    def _validate_stake_request(self, user_address: str, pool_id: str, amount: Decimal,
+                                pending: Decimal = _ZERO) -> Optional[YieldPool]:
+        """Validate stake request with security checks, returning the pool"""
         pool = self.pools.get(pool_id)
         if not pool:
-            return False
+            return None
         
         # Check amount limits
         if amount < pool.min_stake or amount > pool.max_stake:
             logger.error("Amount outside pool limits")
-            return False
+            return None
         
         # Check user's existing positions
-        user_positions = [pos for pos in self.user_positions.values() if pos.user_address == user_address]
-        total_staked = sum(pos.staked_amount for pos in user_positions)
+        amounts = self._pos_amount
+        index = self._pos_id_to_idx
+        total_staked = sum(
+            (amounts[index[pid]] for pid in self.positions_by_user.get(user_address, ())),
+            _ZERO
+        )
         
         # Prevent over-concentration
-        if total_staked + amount > pool.max_stake * Decimal('2'):
+        if total_staked + pending + amount > pool.max_stake * _CONCENTRATION_FACTOR:
             logger.warning("User attempting to over-concentrate in pool")
-            return False
+            return None
         
-        return True
+        return pool
     
     async def execute_flash_loan(self, user_address: str, borrowed_amount: Decimal, 
                                 borrowed_currency: str, collateral_amount: Decimal,
@@ -297,8 +443,16 @@ class YieldFarmingEngine:
                 logger.warning(f"Flash loan rate limit exceeded for user: {user_address}")
                 return False
             
+            # Parse trade profits to Decimal once at the boundary
+            arbitrage_trades = [
+                {**trade, 'profit': Decimal(str(trade['profit']))}
+                if 'profit' in trade and not isinstance(trade['profit'], Decimal) else trade
+                for trade in arbitrage_trades
+            ]
+            
             flash_loan_id = self._generate_secure_id()
-            fee = borrowed_amount * Decimal('0.001')  # 0.1% fee
+            fee = borrowed_amount * _FLASH_FEE_RATE
+            now = time.time()
             
             flash_loan = FlashLoan(
                 id=flash_loan_id,
@@ -308,16 +462,25 @@ class YieldFarmingEngine:
                 collateral_amount=collateral_amount,
                 collateral_currency=collateral_currency,
                 fee=fee,
-                deadline=time.time() + 300,  # 5 minutes
-                status=FlashLoanStatus.PENDING
+                deadline=now + 300,  # 5 minutes
+                status=FlashLoanStatus.PENDING,
+                created_at=now
             )
             
             self.flash_loans[flash_loan_id] = flash_loan
+            self.flash_loans_by_user[user_address].add(flash_loan_id)
+            self._loan_id_to_idx[flash_loan_id] = len(self._loan_created)
+            self._loan_created.append(flash_loan.created_at)
+            heapq.heappush(self._loan_deadlines, (flash_loan.deadline, flash_loan_id))
+            if self._expiry_task is None or self._expiry_task.done():
+                self._expiry_task = asyncio.create_task(self._expiry_loop())
             
             # Execute arbitrage trades
             success = await self._execute_arbitrage_trades(flash_loan, arbitrage_trades)
             
-            if success:
+            if flash_loan.status == FlashLoanStatus.EXPIRED:
+                logger.error(f"Flash loan {flash_loan_id} expired before completion")
+            elif success:
                 flash_loan.status = FlashLoanStatus.COMPLETED
                 # Calculate profit
                 flash_loan.profit = self._calculate_arbitrage_profit(flash_loan, arbitrage_trades)
@@ -332,18 +495,40 @@ class YieldFarmingEngine:
             logger.error(f"Flash loan execution failed: {e}")
             return None
     
+    async def _expiry_loop(self):
+        """Sweep expired flash loans until no deadlines remain"""
+        while self._loan_deadlines:
+            await asyncio.sleep(max(0.0, self._loan_deadlines[0][0] - time.time()))
+            await self._sweep_expired()
+    
+    async def _sweep_expired(self):
+        """Mark unfinished flash loans past their deadline as expired"""
+        now = time.time()
+        deadlines = self._loan_deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, loan_id = heapq.heappop(deadlines)
+            loan = self.flash_loans.get(loan_id)
+            if loan and loan.status in (FlashLoanStatus.PENDING, FlashLoanStatus.EXECUTING):
+                loan.status = FlashLoanStatus.EXPIRED
+                logger.warning(f"Flash loan {loan_id} expired")
+    
     def _validate_flash_loan(self, user_address: str, borrowed_amount: Decimal, borrowed_currency: str) -> bool:
         """Validate flash loan request with security checks"""
         # Check for suspicious patterns
-        if borrowed_amount > Decimal('1000000'):  # 1M limit
+        if borrowed_amount > _LOAN_CAP:
             logger.warning("Flash loan amount too high")
             return False
         
         # Check user's history
-        user_loans = [loan for loan in self.flash_loans.values() if loan.user_address == user_address]
-        recent_loans = [loan for loan in user_loans if time.time() - loan.created_at < 3600]  # Last hour
+        cutoff = time.time() - 3600  # Last hour
+        created = self._loan_created
+        index = self._loan_id_to_idx
+        recent_loans = sum(
+            1 for lid in self.flash_loans_by_user.get(user_address, ())
+            if created[index[lid]] > cutoff
+        )
         
-        if len(recent_loans) > 5:
+        if recent_loans > 5:
             logger.warning("User attempting too many flash loans")
             return False
         
@@ -354,14 +539,30 @@ class YieldFarmingEngine:
         try:
             flash_loan.status = FlashLoanStatus.EXECUTING
             
+            # Trades run concurrently within a stage; stages run in order
+            stages: Dict[int, List[Dict]] = defaultdict(list)
             for trade in trades:
-                # Execute trade on DEX
-                success = await self._execute_trade(trade)
-                if not success:
-                    logger.error(f"Trade execution failed: {trade}")
+                stages[trade.get('stage', 0)].append(trade)
+            
+            for stage in sorted(stages):
+                # Stop once the expiry sweep has given up on this loan
+                if flash_loan.status == FlashLoanStatus.EXPIRED:
                     return False
                 
-                flash_loan.executed_trades.append(trade)
+                stage_trades = stages[stage]
+                
+                # Execute trades on DEX
+                results = await asyncio.gather(
+                    *(self._execute_trade(trade) for trade in stage_trades),
+                    return_exceptions=True
+                )
+                
+                for trade, result in zip(stage_trades, results):
+                    if result is not True:
+                        logger.error(f"Trade execution failed: {trade}")
+                        return False
+                
+                flash_loan.executed_trades.extend(stage_trades)
             
             return True
             
@@ -382,46 +583,40 @@ class YieldFarmingEngine:
     
     def _calculate_arbitrage_profit(self, flash_loan: FlashLoan, trades: List[Dict]) -> Decimal:
         """Calculate profit from arbitrage trades"""
-        total_profit = Decimal('0')
-        
-        for trade in trades:
-            if 'profit' in trade:
-                total_profit += Decimal(str(trade['profit']))
-        
-        # Subtract flash loan fee
-        total_profit -= flash_loan.fee
-        
-        return total_profit
+        # Profits are already Decimal (see execute_flash_loan); subtract flash loan fee
+        return sum((trade['profit'] for trade in trades if 'profit' in trade), _ZERO) - flash_loan.fee
     
-    def _check_rate_limit(self, user_address: str, action: str) -> bool:
-        """Check rate limiting for user actions"""
+    def _check_rate_limit(self, user_address: str, action: str, count: int = 1) -> bool:
+        """Check rate limiting for user actions, charging count tokens or none"""
         current_time = time.time()
+        key = (user_address, action)
+        timestamps = self.rate_limits.get(key)
+        if timestamps is None:
+            timestamps = self.rate_limits[key] = deque()
         
-        if user_address not in self.rate_limits:
-            self.rate_limits[user_address] = {}
-        
-        if action not in self.rate_limits[user_address]:
-            self.rate_limits[user_address][action] = []
-        
-        # Clean old entries
-        self.rate_limits[user_address][action] = [
-            timestamp for timestamp in self.rate_limits[user_address][action]
-            if current_time - timestamp < 3600  # 1 hour window
-        ]
+        # Expire entries that have left the window
+        while timestamps and current_time - timestamps[0] >= _RATE_LIMIT_WINDOW:
+            timestamps.popleft()
         
         # Check limits
-        if action == "stake" and len(self.rate_limits[user_address][action]) >= 10:
-            return False
-        elif action == "flash_loan" and len(self.rate_limits[user_address][action]) >= 5:
+        limit = _LIMITS.get(action)
+        if limit is not None and len(timestamps) + count > limit:
             return False
         
-        # Add current action
-        self.rate_limits[user_address][action].append(current_time)
+        # Add current action(s)
+        timestamps.extend([current_time] * count)
         return True
     
     def _generate_secure_id(self) -> str:
         """Generate cryptographically secure ID"""
-        return secrets.token_hex(16)
+        # One CSPRNG read refills the pool for the next 1024 IDs
+        if self._id_cursor + _ID_BYTES > len(self._id_pool):
+            self._id_pool = secrets.token_bytes(_ID_POOL_SIZE)
+            self._id_cursor = 0
+        
+        start = self._id_cursor
+        self._id_cursor = start + _ID_BYTES
+        return self._id_pool[start:self._id_cursor].hex()
     
     async def get_pool_info(self, pool_id: str) -> Optional[Dict]:
         """Get pool information"""
@@ -429,6 +624,13 @@ class YieldFarmingEngine:
         if not pool:
             return None
         
+        if pool._cached_info is None:
+            pool._cached_info = self._serialize_pool(pool)
+        
+        return dict(pool._cached_info)
+    
+    def _serialize_pool(self, pool: YieldPool) -> Dict:
+        """Serialize pool fields for API responses"""
         return {
             "id": pool.id,
             "name": pool.name,
@@ -438,7 +640,7 @@ class YieldFarmingEngine:
             "total_shares": str(pool.total_shares),
             "apy": str(pool.apy),
             "fees": str(pool.fees),
-            "strategy": pool.strategy.value,
+            "strategy": pool._strategy_value,
             "risk_level": pool.risk_level,
             "min_stake": str(pool.min_stake),
             "max_stake": str(pool.max_stake),
@@ -450,25 +652,93 @@ class YieldFarmingEngine:
     async def get_user_positions(self, user_address: str) -> List[Dict]:
         """Get user's positions across all pools"""
         positions = []
+        append = positions.append
+        pools = self.pools
+        user_positions = self.user_positions
         
-        for position in self.user_positions.values():
-            if position.user_address == user_address:
-                pool = self.pools.get(position.pool_id)
-                if pool:
-                    positions.append({
-                        "id": position.id,
-                        "pool_name": pool.name,
-                        "staked_amount": str(position.staked_amount),
-                        "shares": str(position.shares),
-                        "rewards_earned": str(position.rewards_earned),
-                        "apy": str(pool.apy),
-                        "staked_at": position.staked_at,
-                        "lock_until": position.lock_until,
-                        "is_locked": position.is_locked
-                    })
+        for position_id in self.positions_by_user.get(user_address, ()):
+            position = user_positions.get(position_id)
+            if position is None:
+                continue
+            pool = pools.get(position.pool_id)
+            if pool is None:
+                continue
+            append({
+                "id": position.id,
+                "pool_name": pool.name,
+                "staked_amount": str(position.staked_amount),
+                "shares": str(position.shares),
+                "rewards_earned": str(position.rewards_earned),
+                "apy": str(pool.apy),
+                "staked_at": position.staked_at,
+                "lock_until": position.lock_until,
+                "is_locked": position.is_locked
+            })
         
         return positions
     
+    async def get_user_dashboard(self, user_address: str) -> List[Dict]:
+        """Get user's positions with a pool summary inlined in one pass"""
+        positions = []
+        append = positions.append
+        pools = self.pools
+        user_positions = self.user_positions
+        
+        for position_id in self.positions_by_user.get(user_address, ()):
+            position = user_positions.get(position_id)
+            if position is None:
+                continue
+            pool = pools.get(position.pool_id)
+            if pool is None:
+                continue
+            
+            # Reuse the memoized pool info for the already-stringified fields
+            info = pool._cached_info
+            if info is None:
+                info = pool._cached_info = self._serialize_pool(pool)
+            
+            append({
+                "id": position.id,
+                "pool_id": pool.id,
+                "pool_name": pool.name,
+                "apy": info["apy"],
+                "strategy": info["strategy"],
+                "staked_amount": str(position.staked_amount),
+                "shares": str(position.shares),
+                "rewards_earned": str(position.rewards_earned),
+                "staked_at": position.staked_at,
+                "lock_until": position.lock_until,
+                "is_locked": position.is_locked
+            })
+        
+        return positions
+    
+    async def get_staking_stats(self) -> Dict:
+        """Get aggregate staking and flash loan activity"""
+        # Scans touch only the needed columns, not every position object
+        staked_by_pool: Dict[str, Decimal] = defaultdict(lambda: _ZERO)
+        for pool_id, amount in zip(self._pos_pool, self._pos_amount):
+            staked_by_pool[pool_id] += amount
+        
+        # Loans are appended in creation order, so the window is a binary search
+        cutoff = time.time() - 3600
+        recent_loans = len(self._loan_created) - bisect.bisect_right(self._loan_created, cutoff)
+        
+        return {
+            "total_staked": str(sum(staked_by_pool.values(), _ZERO)),
+            "staked_by_pool": {pool_id: str(amount) for pool_id, amount in staked_by_pool.items()},
+            "total_positions": len(self._pos_user),
+            "flash_loans_last_hour": recent_loans
+        }
+    
+    async def get_user_dashboard_json(self, user_address: str) -> bytes:
+        """Get the user dashboard as a serialized JSON response body"""
+        return dumps_response(await self.get_user_dashboard(user_address))
+    
+    async def get_staking_stats_json(self) -> bytes:
+        """Get the staking stats as a serialized JSON response body"""
+        return dumps_response(await self.get_staking_stats())
+    
     async def get_arbitrage_opportunities(self) -> List[Dict]:
         """Get current arbitrage opportunities for flash loans"""
         # This would analyze price differences across exchanges
@@ -6,18 +6,91 @@ Advanced decentralized exchange functionality with order book and AMM support
 
 import asyncio
 import logging
+import math
+import sys
 import time
-from typing import Dict, List, Optional, Any, Tuple, Union
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
 from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
-import heapq
+from itertools import islice
+
+import numpy as np
+from sortedcontainers import SortedDict
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 from core.xrpl_client import XRPLClient, XRPLAccount
 from config import DEX_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Default fixed-point scales: prices and amounts are stored as integer ticks/lots
+_PRICE_DECIMALS = 8
+_QTY_DECIMALS = 8
+
+# Fee rates are fixed-point too, fine enough that sub-bp fees are kept exactly
+_FEE_DECIMALS = 8
+_FEE_SCALE = 10 ** _FEE_DECIMALS
+
+# Recent trades kept in memory, engine-wide and per user
+_TRADE_HISTORY = 1_000_000
+_USER_TRADE_HISTORY = 10_000
+
+# Depth of the cached order book snapshot; deeper requests are built on demand
+_SNAPSHOT_DEPTH = 100
+
+def _as_ticks(value: Union[int, float, Decimal, str], decimals: int, scale: int) -> int:
+    """Scale a price/amount to an integer, parsing text only when the type needs it"""
+    if isinstance(value, int):
+        return value * scale
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    scaled = value.scaleb(decimals)
+    ticks = scaled.to_integral_value()
+    # Off-grid input is an error, not something to round away silently
+    if ticks != scaled:
+        raise ValueError(f"{value} is not a multiple of 1e-{decimals}")
+    return int(ticks)
+
+def _match_levels(bid_prices, bid_amounts, ask_prices, ask_amounts):
+    """Sweep crossing orders best-first; returns (bid_idx, ask_idx, amount, price) per fill"""
+    n_bids = bid_prices.shape[0]
+    n_asks = ask_prices.shape[0]
+    size = n_bids + n_asks
+    fill_bid = np.empty(size, np.int64)
+    fill_ask = np.empty(size, np.int64)
+    fill_amount = np.empty(size, np.int64)
+    fill_price = np.empty(size, np.int64)
+    
+    bi = 0
+    ai = 0
+    k = 0
+    while bi < n_bids and ai < n_asks and bid_prices[bi] >= ask_prices[ai]:
+        amount = min(bid_amounts[bi], ask_amounts[ai])
+        fill_bid[k] = bi
+        fill_ask[k] = ai
+        fill_amount[k] = amount
+        fill_price[k] = bid_prices[bi]  # Use bid price for matching
+        k += 1
+        
+        bid_amounts[bi] -= amount
+        ask_amounts[ai] -= amount
+        if bid_amounts[bi] == 0:
+            bi += 1
+        if ask_amounts[ai] == 0:
+            ai += 1
+    
+    return fill_bid[:k], fill_ask[:k], fill_amount[:k], fill_price[:k]
+
+if NUMBA_AVAILABLE:
+    _match_levels = numba.njit(cache=True)(_match_levels)
+
 class OrderType(Enum):
     """Order types"""
     MARKET = "market"
@@ -38,80 +111,120 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
     REJECTED = "rejected"
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    """Order representation"""
+    """Order representation (prices and amounts in scaled integer units)"""
     id: str
     user_address: str
     side: OrderSide
     order_type: OrderType
     base_currency: str
     quote_currency: str
-    base_amount: Decimal
-    quote_amount: Decimal
-    price: Optional[Decimal] = None
-    filled_amount: Decimal = Decimal('0')
-    remaining_amount: Decimal = Decimal('0')
+    base_amount: int
+    quote_amount: int
+    price: Optional[int] = None
+    filled_amount: int = 0
+    remaining_amount: int = 0
     status: OrderStatus = OrderStatus.PENDING
     timestamp: float = field(default_factory=time.time)
     expires_at: Optional[float] = None
-    stop_price: Optional[Decimal] = None
-    take_profit_price: Optional[Decimal] = None
+    stop_price: Optional[int] = None
+    take_profit_price: Optional[int] = None
+    cancelled: bool = False  # set when removed from the book; its level drops it lazily
     
     def __post_init__(self):
-        if self.remaining_amount == Decimal('0'):
+        if self.remaining_amount == 0:
             self.remaining_amount = self.base_amount
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
-    """Trade representation"""
+    """Trade representation (prices and amounts in scaled integer units)"""
     id: str
     base_currency: str
     quote_currency: str
-    base_amount: Decimal
-    quote_amount: Decimal
-    price: Decimal
+    base_amount: int
+    quote_amount: int
+    price: int
     maker_order_id: str
     taker_order_id: str
     maker_address: str
     taker_address: str
     timestamp: float = field(default_factory=time.time)
-    fee: Decimal = Decimal('0')
+    fee: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class OrderBookLevel:
     """Order book level representation"""
-    price: Decimal
-    total_amount: Decimal
+    price: int
+    total_amount: int
     order_count: int
-    orders: List[Order] = field(default_factory=list)
+    orders: deque = field(default_factory=deque)
+
+class PriceQuantityConverter:
+    """Converts external prices/amounts to scaled integers and back"""
+    
+    def __init__(self, price_decimals: int = _PRICE_DECIMALS, qty_decimals: int = _QTY_DECIMALS):
+        self.price_decimals = price_decimals
+        self.qty_decimals = qty_decimals
+        self.price_scale = 10 ** price_decimals
+        self.qty_scale = 10 ** qty_decimals
+    
+    def price_to_internal(self, price: Union[int, float, Decimal, str]) -> int:
+        """Convert a price to integer ticks"""
+        return _as_ticks(price, self.price_decimals, self.price_scale)
+    
+    def qty_to_internal(self, amount: Union[int, float, Decimal, str]) -> int:
+        """Convert an amount to integer lots"""
+        return _as_ticks(amount, self.qty_decimals, self.qty_scale)
+    
+    def price_from_internal(self, price: int) -> Decimal:
+        """Convert integer ticks back to a Decimal price"""
+        return Decimal(price).scaleb(-self.price_decimals)
+    
+    def qty_from_internal(self, amount: int) -> Decimal:
+        """Convert integer lots back to a Decimal amount"""
+        return Decimal(amount).scaleb(-self.qty_decimals)
 
 class OrderBook:
     """Order book implementation with efficient matching"""
     
-    def __init__(self, base_currency: str, quote_currency: str):
+    def __init__(self, base_currency: str, quote_currency: str,
+                 converter: Optional[PriceQuantityConverter] = None):
         self.base_currency = base_currency
         self.quote_currency = quote_currency
+        self.converter = converter or PriceQuantityConverter()
+        self.taker_fee_rate = 0  # in units of 1 / _FEE_SCALE
         
-        # Buy orders (descending price) - highest price first
-        self.buy_orders: List[OrderBookLevel] = []
-        # Sell orders (ascending price) - lowest price first
-        self.sell_orders: List[OrderBookLevel] = []
+        # Price levels keyed by price; best bid is the last key, best ask the first
+        self.bids: SortedDict = SortedDict()
+        self.asks: SortedDict = SortedDict()
         
         # Order lookup by ID
         self.orders: Dict[str, Order] = {}
         
-        # Price levels lookup
-        self.buy_levels: Dict[Decimal, OrderBookLevel] = {}
-        self.sell_levels: Dict[Decimal, OrderBookLevel] = {}
+        # Price-less stop/take-profit orders wait here, outside the price levels
+        self.trigger_orders: Dict[str, Order] = {}
+        
+        # Serializes matching on this book only
+        self.match_lock = asyncio.Lock()
+        
+        # Snapshot cache, rebuilt after the book changes
+        self._snapshot_cache: Optional[Tuple[List[Tuple], List[Tuple]]] = None
+        self._snapshot_dirty = True
     
     def add_order(self, order: Order) -> bool:
         """Add order to order book"""
-        if order.id in self.orders:
+        if order.id in self.orders or order.id in self.trigger_orders:
             logger.warning(f"Order {order.id} already exists")
             return False
         
+        # A None key would break price ordering in the level maps
+        if order.price is None:
+            logger.warning(f"Order {order.id} has no price; use add_trigger_order")
+            return False
+        
         self.orders[order.id] = order
+        self._snapshot_dirty = True
         
         if order.side == OrderSide.BUY:
             self._add_buy_order(order)
@@ -120,15 +233,29 @@ class OrderBook:
         
         return True
     
+    def add_trigger_order(self, order: Order) -> bool:
+        """Hold a price-less order until its trigger fires"""
+        if order.id in self.orders or order.id in self.trigger_orders:
+            logger.warning(f"Order {order.id} already exists")
+            return False
+        
+        self.trigger_orders[order.id] = order
+        return True
+    
+    def get_order(self, order_id: str) -> Optional[Order]:
+        """Find a resting or trigger order by ID"""
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.trigger_orders.get(order_id)
+        return order
+    
     def _add_buy_order(self, order: Order):
         """Add buy order to order book"""
         price = order.price
-        if price not in self.buy_levels:
-            level = OrderBookLevel(price, Decimal('0'), 0)
-            self.buy_levels[price] = level
-            heapq.heappush(self.buy_orders, (-price, level))
+        level = self.bids.get(price)
+        if level is None:
+            level = self.bids[price] = OrderBookLevel(price, 0, 0)
         
-        level = self.buy_levels[price]
         level.total_amount += order.remaining_amount
         level.order_count += 1
         level.orders.append(order)
@@ -136,12 +263,10 @@ class OrderBook:
     def _add_sell_order(self, order: Order):
         """Add sell order to order book"""
         price = order.price
-        if price not in self.sell_levels:
-            level = OrderBookLevel(price, Decimal('0'), 0)
-            self.sell_levels[price] = level
-            heapq.heappush(self.sell_orders, (price, level))
+        level = self.asks.get(price)
+        if level is None:
+            level = self.asks[price] = OrderBookLevel(price, 0, 0)
         
-        level = self.sell_levels[price]
         level.total_amount += order.remaining_amount
         level.order_count += 1
         level.orders.append(order)
@@ -149,10 +274,15 @@ class OrderBook:
     def remove_order(self, order_id: str) -> bool:
         """Remove order from order book"""
         if order_id not in self.orders:
-            return False
+            trigger = self.trigger_orders.pop(order_id, None)
+            if trigger is None:
+                return False
+            trigger.cancelled = True
+            return True
         
-        order = self.orders[order_id]
-        del self.orders[order_id]
+        order = self.orders.pop(order_id)
+        order.cancelled = True
+        self._snapshot_dirty = True
         
         if order.side == OrderSide.BUY:
             self._remove_buy_order(order)
@@ -164,41 +294,50 @@ class OrderBook:
     def _remove_buy_order(self, order: Order):
         """Remove buy order from order book"""
         price = order.price
-        if price in self.buy_levels:
-            level = self.buy_levels[price]
+        level = self.bids.get(price)
+        if level is not None:
             level.total_amount -= order.remaining_amount
             level.order_count -= 1
-            level.orders.remove(order)
             
             if level.order_count == 0:
-                del self.buy_levels[price]
-                # Remove from heap (this is simplified - in production you'd need more sophisticated heap management)
+                del self.bids[price]
     
     def _remove_sell_order(self, order: Order):
         """Remove sell order from order book"""
         price = order.price
-        if price in self.sell_levels:
-            level = self.sell_levels[price]
+        level = self.asks.get(price)
+        if level is not None:
             level.total_amount -= order.remaining_amount
             level.order_count -= 1
-            level.orders.remove(order)
             
             if level.order_count == 0:
-                del self.sell_levels[price]
+                del self.asks[price]
     
-    def get_best_bid(self) -> Optional[Decimal]:
+    def get_best_bid(self) -> Optional[int]:
         """Get best bid price"""
-        if not self.buy_orders:
+        if not self.bids:
             return None
-        return -self.buy_orders[0][0]  # Negative because we store as negative for max heap
+        return self.bids.peekitem(-1)[0]
     
-    def get_best_ask(self) -> Optional[Decimal]:
+    def get_best_ask(self) -> Optional[int]:
         """Get best ask price"""
-        if not self.sell_orders:
+        if not self.asks:
+            return None
+        return self.asks.peekitem(0)[0]
+    
+    def peek_best_bid_level(self) -> Optional[OrderBookLevel]:
+        """Get the best bid level without a price lookup"""
+        if not self.bids:
+            return None
+        return self.bids.peekitem(-1)[1]
+    
+    def peek_best_ask_level(self) -> Optional[OrderBookLevel]:
+        """Get the best ask level without a price lookup"""
+        if not self.asks:
             return None
-        return self.sell_orders[0][0]
+        return self.asks.peekitem(0)[1]
     
-    def get_spread(self) -> Optional[Decimal]:
+    def get_spread(self) -> Optional[int]:
         """Get current spread"""
         best_bid = self.get_best_bid()
         best_ask = self.get_best_ask()
@@ -209,39 +348,69 @@ class OrderBook:
     
     def get_order_book_snapshot(self, depth: int = 10) -> Dict[str, List]:
         """Get order book snapshot"""
-        bids = []
-        asks = []
+        if depth > _SNAPSHOT_DEPTH:
+            bids, asks = self._build_snapshot(depth)
+        else:
+            if self._snapshot_dirty:
+                self._snapshot_cache = self._build_snapshot(_SNAPSHOT_DEPTH)
+                self._snapshot_dirty = False
+            bids, asks = self._snapshot_cache
+        
+        # Cached rows are immutable tuples; callers get fresh dicts they may modify
+        return {
+            'bids': [{'price': price, 'amount': amount, 'count': count} for price, amount, count in bids[:depth]],
+            'asks': [{'price': price, 'amount': amount, 'count': count} for price, amount, count in asks[:depth]],
+            'timestamp': time.time()
+        }
+    
+    def snapshot_arrays(self, depth: int = 10) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Get top-of-book bid/ask prices and sizes as float64 arrays for analytics"""
+        price_scale = self.converter.price_scale
+        qty_scale = self.converter.qty_scale
+        bid_levels = list(islice(reversed(self.bids.values()), depth))
+        ask_levels = list(islice(self.asks.values(), depth))
+        
+        bid_prices = np.fromiter((level.price for level in bid_levels), np.float64, len(bid_levels)) / price_scale
+        bid_sizes = np.fromiter((level.total_amount for level in bid_levels), np.float64, len(bid_levels)) / qty_scale
+        ask_prices = np.fromiter((level.price for level in ask_levels), np.float64, len(ask_levels)) / price_scale
+        ask_sizes = np.fromiter((level.total_amount for level in ask_levels), np.float64, len(ask_levels)) / qty_scale
+        return bid_prices, bid_sizes, ask_prices, ask_sizes
+    
+    def _build_snapshot(self, depth: int) -> Tuple[List[Tuple], List[Tuple]]:
+        """Build (price, amount, count) rows for a snapshot"""
+        price_scale = self.converter.price_scale
+        qty_scale = self.converter.qty_scale
         
         # Get top bids
-        for i, (neg_price, level) in enumerate(self.buy_orders[:depth]):
-            bids.append({
-                'price': float(-neg_price),
-                'amount': float(level.total_amount),
-                'count': level.order_count
-            })
+        bids = [
+            (level.price / price_scale, level.total_amount / qty_scale, level.order_count)
+            for level in islice(reversed(self.bids.values()), depth)
+        ]
         
         # Get top asks
-        for i, (price, level) in enumerate(self.sell_orders[:depth]):
-            asks.append({
-                'price': float(price),
-                'amount': float(level.total_amount),
-                'count': level.order_count
-            })
+        asks = [
+            (level.price / price_scale, level.total_amount / qty_scale, level.order_count)
+            for level in islice(self.asks.values(), depth)
+        ]
         
-        return {
-            'bids': bids,
-            'asks': asks,
-            'timestamp': time.time()
-        }
+        return bids, asks
 
 class DEXTradingEngine:
     """Main DEX trading engine"""
     
     def __init__(self, xrpl_client: XRPLClient):
         self.xrpl_client = xrpl_client
-        self.order_books: Dict[str, OrderBook] = {}
-        self.trades: List[Trade] = []
-        self.users: Dict[str, Dict[str, Decimal]] = {}  # user -> currency -> balance
+        self.order_books: Dict[Tuple[str, str], OrderBook] = {}
+        self.trades: deque = deque(maxlen=_TRADE_HISTORY)
+        self.trade_seq = 0
+        self.balances: Dict[Tuple[str, str], int] = defaultdict(int)  # (user, currency) -> balance (in lots)
+        
+        # Per-user secondary indexes: open order ids and executed trades
+        self.user_orders: Dict[str, Set[str]] = defaultdict(set)
+        self.user_trades: Dict[str, deque] = defaultdict(lambda: deque(maxlen=_USER_TRADE_HISTORY))
+        
+        # Open order id -> pair key
+        self.order_index: Dict[str, Tuple[str, str]] = {}
         
         # Trading pairs
         self.trading_pairs: List[Tuple[str, str]] = []
@@ -251,12 +420,25 @@ class DEXTradingEngine:
         
         # Order ID counter
         self.order_id_counter = 0
+        
+        # Compile the matching kernel up front rather than on the first crossing order
+        if NUMBA_AVAILABLE:
+            one = np.ones(1, dtype=np.int64)
+            _match_levels(one, one.copy(), one, one.copy())
     
-    def add_trading_pair(self, base_currency: str, quote_currency: str):
+    def add_trading_pair(self, base_currency: str, quote_currency: str, price_decimals: int = _PRICE_DECIMALS):
         """Add a new trading pair"""
-        pair_key = f"{base_currency}_{quote_currency}"
+        # Interned currency codes keep pair-key hashing and comparison cheap
+        base_currency = sys.intern(base_currency)
+        quote_currency = sys.intern(quote_currency)
+        pair_key = (base_currency, quote_currency)
         if pair_key not in self.order_books:
-            self.order_books[pair_key] = OrderBook(base_currency, quote_currency)
+            # Amounts share one scale across pairs so balances stay comparable
+            converter = PriceQuantityConverter(price_decimals, _QTY_DECIMALS)
+            order_book = OrderBook(base_currency, quote_currency, converter)
+            # Fee rate is fixed per book so matching never touches the fee dict
+            order_book.taker_fee_rate = _as_ticks(self.fee_structure["taker"], _FEE_DECIMALS, _FEE_SCALE)
+            self.order_books[pair_key] = order_book
             self.trading_pairs.append((base_currency, quote_currency))
             logger.info(f"Added trading pair: {base_currency}/{quote_currency}")
     
@@ -267,7 +449,8 @@ class DEXTradingEngine:
     
     def _generate_trade_id(self) -> str:
         """Generate unique trade ID"""
-        return f"trade_{int(time.time())}_{len(self.trades)}"
+        self.trade_seq += 1
+        return f"trade_{int(time.time())}_{self.trade_seq}"
     
     async def place_order(
         self,
@@ -277,22 +460,26 @@ class DEXTradingEngine:
         base_currency: str,
         quote_currency: str,
         base_amount: Union[float, Decimal],
-        price: Optional[float] = None,
-        stop_price: Optional[float] = None,
-        take_profit_price: Optional[float] = None
+        price: Optional[Union[float, Decimal]] = None,
+        stop_price: Optional[Union[float, Decimal]] = None,
+        take_profit_price: Optional[Union[float, Decimal]] = None
     ) -> Optional[Order]:
         """Place a new order"""
         try:
             # Validate trading pair
-            pair_key = f"{base_currency}_{quote_currency}"
-            if pair_key not in self.order_books:
+            base_currency = sys.intern(base_currency)
+            quote_currency = sys.intern(quote_currency)
+            pair_key = (base_currency, quote_currency)
+            order_book = self.order_books.get(pair_key)
+            if order_book is None:
                 raise ValueError(f"Trading pair {base_currency}/{quote_currency} not supported")
             
-            # Convert to Decimal
-            base_amount = Decimal(str(base_amount))
-            price = Decimal(str(price)) if price else None
-            stop_price = Decimal(str(stop_price)) if stop_price else None
-            take_profit_price = Decimal(str(take_profit_price)) if take_profit_price else None
+            # Convert to scaled integers once at the boundary
+            converter = order_book.converter
+            base_amount = converter.qty_to_internal(base_amount)
+            price = converter.price_to_internal(price) if price else None
+            stop_price = converter.price_to_internal(stop_price) if stop_price else None
+            take_profit_price = converter.price_to_internal(take_profit_price) if take_profit_price else None
             
             # Validate order
             if base_amount <= 0:
@@ -305,7 +492,7 @@ class DEXTradingEngine:
                 raise ValueError("Stop price required for stop orders")
             
             # Calculate quote amount
-            quote_amount = base_amount * price if price else Decimal('0')
+            quote_amount = base_amount * price // converter.price_scale if price else 0
             
             # Check user balance
             if not await self._check_user_balance(user_address, base_currency, base_amount, side):
@@ -326,15 +513,40 @@ class DEXTradingEngine:
                 take_profit_price=take_profit_price
             )
             
-            # Add to order book
-            if self.order_books[pair_key].add_order(order):
+            # Market orders never rest in the book: sweep, then release any remainder
+            if order_type == OrderType.MARKET:
+                await self._reserve_balance(user_address, base_currency, base_amount, side)
+                await self._match_market_order(order, order_book)
+                
+                if order.remaining_amount:
+                    await self._release_balance(user_address, base_currency, order.remaining_amount, side)
+                    order.status = OrderStatus.CANCELLED
+                else:
+                    order.status = OrderStatus.FILLED
+                
+                logger.info(f"Market order executed: {order.id} - {side.value} "
+                            f"{converter.qty_from_internal(order.filled_amount)} {base_currency}")
+                return order
+            
+            # Price-less stop/take-profit orders wait outside the price levels for their trigger
+            is_trigger = price is None
+            
+            # Add to order book; the lock keeps inserts out of an in-flight sweep
+            async with order_book.match_lock:
+                added = order_book.add_trigger_order(order) if is_trigger else order_book.add_order(order)
+            if added:
+                self.user_orders[user_address].add(order.id)
+                self.order_index[order.id] = pair_key
+                
                 # Reserve balance
                 await self._reserve_balance(user_address, base_currency, base_amount, side)
                 
-                # Try to match immediately
-                await self._try_match_orders(pair_key)
+                # Try to match immediately; trigger orders cannot cross yet
+                if not is_trigger:
+                    await self._try_match_orders(pair_key)
                 
-                logger.info(f"Order placed: {order.id} - {side.value} {base_amount} {base_currency} @ {price}")
+                logger.info(f"Order placed: {order.id} - {side.value} {converter.qty_from_internal(base_amount)} "
+                            f"{base_currency} @ {converter.price_from_internal(price) if price is not None else 'stop'}")
                 return order
             else:
                 raise ValueError("Failed to add order to order book")
@@ -347,54 +559,71 @@ class DEXTradingEngine:
         """Cancel an existing order"""
         try:
             # Find order
-            order = None
-            for pair_key, order_book in self.order_books.items():
-                if order_id in order_book.orders:
-                    order = order_book.orders[order_id]
-                    break
-            
-            if not order:
+            pair_key = self.order_index.get(order_id)
+            if pair_key is None:
                 raise ValueError("Order not found")
             
-            if order.user_address != user_address:
-                raise ValueError("Cannot cancel another user's order")
+            order_book = self.order_books[pair_key]
+            
+            # Hold the match lock so a sweep never sees the order vanish mid-fill
+            async with order_book.match_lock:
+                order = order_book.get_order(order_id)
+                if order is None:
+                    raise ValueError("Order not found")
+                
+                if order.user_address != user_address:
+                    raise ValueError("Cannot cancel another user's order")
+                
+                if order.status in [OrderStatus.FILLED, OrderStatus.CANCELLED]:
+                    raise ValueError("Order cannot be cancelled")
+                
+                # Remove from order book
+                order_book.remove_order(order_id)
+                del self.order_index[order_id]
             
-            if order.status in [OrderStatus.FILLED, OrderStatus.CANCELLED]:
-                raise ValueError("Order cannot be cancelled")
+            # Release reserved balance
+            await self._release_balance(user_address, order.base_currency, order.remaining_amount, order.side)
             
-            # Remove from order book
-            for pair_key, order_book in self.order_books.items():
-                if order_book.remove_order(order_id):
-                    # Release reserved balance
-                    await self._release_balance(user_address, order.base_currency, order.remaining_amount, order.side)
-                    
-                    # Update order status
-                    order.status = OrderStatus.CANCELLED
-                    
-                    logger.info(f"Order cancelled: {order_id}")
-                    return True
+            # Update order status
+            order.status = OrderStatus.CANCELLED
+            self.user_orders[user_address].discard(order_id)
             
-            return False
+            logger.info(f"Order cancelled: {order_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to cancel order: {e}")
             return False
     
-    async def _try_match_orders(self, pair_key: str):
+    async def _try_match_orders(self, pair_key: Tuple[str, str]):
         """Try to match orders in the order book"""
         order_book = self.order_books[pair_key]
         
-        while True:
-            best_bid = order_book.get_best_bid()
-            best_ask = order_book.get_best_ask()
-            
-            # Check if orders can be matched
-            if not best_bid or not best_ask or best_bid < best_ask:
-                break
-            
-            # Get orders at best prices
-            bid_level = order_book.buy_levels[best_bid]
-            ask_level = order_book.sell_levels[best_ask]
+        # Per-book lock: a sweep on one pair never waits on another pair
+        async with order_book.match_lock:
+            # The compiled sweep only pays off once the JIT is available
+            if NUMBA_AVAILABLE:
+                await self._match_orders_compiled(order_book)
+            else:
+                await self._match_orders_python(order_book)
+    
+    async def _match_orders_python(self, order_book: OrderBook):
+        """Match crossing orders one fill at a time"""
+        # Top-of-book levels and prices are held across fills; a side is
+        # re-peeked only after its level empties
+        bid_level = order_book.peek_best_bid_level()
+        ask_level = order_book.peek_best_ask_level()
+        if bid_level is None or ask_level is None:
+            return
+        best_bid = bid_level.price
+        best_ask = ask_level.price
+        
+        while best_bid >= best_ask:
+            # Drop removed orders still queued at the front of each level
+            while bid_level.orders and bid_level.orders[0].cancelled:
+                bid_level.orders.popleft()
+            while ask_level.orders and ask_level.orders[0].cancelled:
+                ask_level.orders.popleft()
             
             if not bid_level.orders or not ask_level.orders:
                 break
@@ -408,33 +637,148 @@ class DEXTradingEngine:
             trade_price = best_bid  # Use bid price for matching
             
             # Execute trade
-            await self._execute_trade(bid_order, ask_order, trade_amount, trade_price, pair_key)
+            if not await self._execute_trade(bid_order, ask_order, trade_amount, trade_price, order_book):
+                break
+            
+            # Keep level aggregates in step with the fill
+            bid_level.total_amount -= trade_amount
+            ask_level.total_amount -= trade_amount
+            order_book._snapshot_dirty = True
             
             # Check if orders are fully filled
             if bid_order.remaining_amount == 0:
-                bid_order.status = OrderStatus.FILLED
-                order_book.remove_order(bid_order.id)
+                self._close_filled_order(order_book, order_book.bids, bid_level, bid_order)
+                if bid_level.order_count == 0:
+                    bid_level = order_book.peek_best_bid_level()
+                    if bid_level is None:
+                        break
+                    best_bid = bid_level.price
+            
+            if ask_order.remaining_amount == 0:
+                self._close_filled_order(order_book, order_book.asks, ask_level, ask_order)
+                if ask_level.order_count == 0:
+                    ask_level = order_book.peek_best_ask_level()
+                    if ask_level is None:
+                        break
+                    best_ask = ask_level.price
+    
+    async def _match_orders_compiled(self, order_book: OrderBook):
+        """Plan the whole crossing sweep in the compiled kernel, then apply the fills"""
+        best_bid = order_book.get_best_bid()
+        best_ask = order_book.get_best_ask()
+        if best_bid is None or best_ask is None or best_bid < best_ask:
+            return
+        
+        # Only orders priced through the opposite best can ever trade in this sweep
+        bids = order_book.bids
+        asks = order_book.asks
+        bid_entries = [
+            (order, level)
+            for level in map(bids.__getitem__, bids.irange(minimum=best_ask, reverse=True))
+            for order in level.orders
+            if not order.cancelled
+        ]
+        ask_entries = [
+            (order, level)
+            for level in map(asks.__getitem__, asks.irange(maximum=best_bid))
+            for order in level.orders
+            if not order.cancelled
+        ]
+        bid_orders = [order for order, _ in bid_entries]
+        ask_orders = [order for order, _ in ask_entries]
+        
+        fill_bid, fill_ask, fill_amount, fill_price = _match_levels(
+            np.array([o.price for o in bid_orders], dtype=np.int64),
+            np.array([o.remaining_amount for o in bid_orders], dtype=np.int64),
+            np.array([o.price for o in ask_orders], dtype=np.int64),
+            np.array([o.remaining_amount for o in ask_orders], dtype=np.int64)
+        )
+        
+        for bi, ai, amount, price in zip(fill_bid.tolist(), fill_ask.tolist(),
+                                         fill_amount.tolist(), fill_price.tolist()):
+            bid_order, bid_level = bid_entries[bi]
+            ask_order, ask_level = ask_entries[ai]
+            
+            # The plan is stale once either side was removed; the next sweep replans
+            if bid_order.cancelled or ask_order.cancelled:
+                break
             
+            if not await self._execute_trade(bid_order, ask_order, amount, price, order_book):
+                break
+            
+            # Keep level aggregates in step with the fill
+            bid_level.total_amount -= amount
+            ask_level.total_amount -= amount
+            order_book._snapshot_dirty = True
+            
+            if bid_order.remaining_amount == 0:
+                self._close_filled_order(order_book, bids, bid_level, bid_order)
             if ask_order.remaining_amount == 0:
-                ask_order.status = OrderStatus.FILLED
-                order_book.remove_order(ask_order.id)
+                self._close_filled_order(order_book, asks, ask_level, ask_order)
+    
+    async def _match_market_order(self, order: Order, order_book: OrderBook):
+        """Sweep the opposite side for a market order without inserting it"""
+        is_buy = order.side == OrderSide.BUY
+        levels = order_book.asks if is_buy else order_book.bids
+        best = 0 if is_buy else -1
+        
+        async with order_book.match_lock:
+            while order.remaining_amount > 0 and levels:
+                level = levels.peekitem(best)[1]
+                
+                # Drop removed orders still queued at the front of the level
+                resting_orders = level.orders
+                while resting_orders and resting_orders[0].cancelled:
+                    resting_orders.popleft()
+                if not resting_orders:
+                    break
+                
+                resting = resting_orders[0]
+                amount = min(order.remaining_amount, resting.remaining_amount)
+                bid_order, ask_order = (order, resting) if is_buy else (resting, order)
+                
+                # Market orders take the resting order's price
+                if not await self._execute_trade(bid_order, ask_order, amount, level.price, order_book):
+                    break
+                
+                level.total_amount -= amount
+                order_book._snapshot_dirty = True
+                
+                if resting.remaining_amount == 0:
+                    self._close_filled_order(order_book, levels, level, resting)
+    
+    def _close_filled_order(self, order_book: OrderBook, levels: SortedDict,
+                            level: OrderBookLevel, order: Order):
+        """Pop a fully filled order off the front of its level"""
+        # Fills consume levels front-first, so only cancelled orders can precede it
+        orders = level.orders
+        while orders.popleft() is not order:
+            pass
+        level.order_count -= 1
+        if level.order_count == 0:
+            del levels[level.price]
+        
+        order_book.orders.pop(order.id, None)
+        order.status = OrderStatus.FILLED
+        self.order_index.pop(order.id, None)
+        self.user_orders[order.user_address].discard(order.id)
     
     async def _execute_trade(
         self,
         bid_order: Order,
         ask_order: Order,
-        amount: Decimal,
-        price: Decimal,
-        pair_key: str
-    ):
+        amount: int,
+        price: int,
+        order_book: OrderBook
+    ) -> bool:
         """Execute a trade between two orders"""
         try:
             # Calculate amounts
-            quote_amount = amount * price
+            quote_amount = amount * price // order_book.converter.price_scale
             
             # Calculate fees
-            bid_fee = amount * self.fee_structure["taker"]
-            ask_fee = amount * self.fee_structure["taker"]
+            bid_fee = amount * order_book.taker_fee_rate // _FEE_SCALE
+            ask_fee = bid_fee
             
             # Create trade record
             trade = Trade(
@@ -452,6 +796,9 @@ class DEXTradingEngine:
             )
             
             self.trades.append(trade)
+            self.user_trades[trade.taker_address].append(trade)
+            if trade.maker_address != trade.taker_address:
+                self.user_trades[trade.maker_address].append(trade)
             
             # Update order amounts
             bid_order.filled_amount += amount
@@ -464,23 +811,24 @@ class DEXTradingEngine:
                 bid_order, ask_order, amount, quote_amount, bid_fee, ask_fee
             )
             
-            logger.info(f"Trade executed: {trade.id} - {amount} {bid_order.base_currency} @ {price}")
+            converter = order_book.converter
+            logger.info(f"Trade executed: {trade.id} - {converter.qty_from_internal(amount)} "
+                        f"{bid_order.base_currency} @ {converter.price_from_internal(price)}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to execute trade: {e}")
+            return False
     
     async def _check_user_balance(
         self,
         user_address: str,
         currency: str,
-        amount: Decimal,
+        amount: int,
         side: OrderSide
     ) -> bool:
         """Check if user has sufficient balance"""
-        if user_address not in self.users:
-            self.users[user_address] = {}
-        
-        user_balance = self.users[user_address].get(currency, Decimal('0'))
+        user_balance = self.balances.get((user_address, currency), 0)
         
         if side == OrderSide.BUY:
             # For buy orders, check quote currency balance
@@ -493,107 +841,186 @@ class DEXTradingEngine:
         self,
         user_address: str,
         currency: str,
-        amount: Decimal,
+        amount: int,
         side: OrderSide
     ):
         """Reserve balance for an order"""
-        if user_address not in self.users:
-            self.users[user_address] = {}
-        
-        if currency not in self.users[user_address]:
-            self.users[user_address][currency] = Decimal('0')
-        
-        # Reserve the balance
-        self.users[user_address][currency] -= amount
+        self.balances[(user_address, currency)] -= amount
     
     async def _release_balance(
         self,
         user_address: str,
         currency: str,
-        amount: Decimal,
+        amount: int,
         side: OrderSide
     ):
         """Release reserved balance"""
-        if user_address in self.users and currency in self.users[user_address]:
-            self.users[user_address][currency] += amount
+        self.balances[(user_address, currency)] += amount
     
     async def _update_balances_after_trade(
         self,
         bid_order: Order,
         ask_order: Order,
-        amount: Decimal,
-        quote_amount: Decimal,
-        bid_fee: Decimal,
-        ask_fee: Decimal
+        amount: int,
+        quote_amount: int,
+        bid_fee: int,
+        ask_fee: int
     ):
         """Update user balances after a trade"""
-        # Update bid order user (buyer)
-        if bid_order.user_address not in self.users:
-            self.users[bid_order.user_address] = {}
+        balances = self.balances
+        buyer = bid_order.user_address
+        seller = ask_order.user_address
+        base = bid_order.base_currency
+        quote = bid_order.quote_currency
         
         # Buyer receives base currency, pays quote currency
-        self.users[bid_order.user_address][bid_order.base_currency] = \
-            self.users[bid_order.user_address].get(bid_order.base_currency, Decimal('0')) + amount
-        
-        self.users[bid_order.user_address][bid_order.quote_currency] = \
-            self.users[bid_order.user_address].get(bid_order.quote_currency, Decimal('0')) - quote_amount - bid_fee
-        
-        # Update ask order user (seller)
-        if ask_order.user_address not in self.users:
-            self.users[ask_order.user_address] = {}
+        balances[(buyer, base)] += amount
+        balances[(buyer, quote)] -= quote_amount + bid_fee
         
         # Seller receives quote currency, pays base currency
-        self.users[ask_order.user_address][bid_order.quote_currency] = \
-            self.users[ask_order.user_address].get(bid_order.quote_currency, Decimal('0')) + quote_amount - ask_fee
-        
-        self.users[ask_order.user_address][bid_order.base_currency] = \
-            self.users[ask_order.user_address].get(bid_order.base_currency, Decimal('0')) - amount
+        balances[(seller, quote)] += quote_amount - ask_fee
+        balances[(seller, base)] -= amount
     
     def get_user_orders(self, user_address: str) -> List[Order]:
-        """Get all orders for a user"""
-        orders = []
-        for order_book in self.order_books.values():
-            for order in order_book.orders.values():
-                if order.user_address == user_address:
-                    orders.append(order)
-        return orders
+        """Get all orders for a user (scaled integers; see serialize_order)"""
+        orders = (self._lookup_order(order_id) for order_id in self.user_orders.get(user_address, ()))
+        return [order for order in orders if order is not None]
     
     def get_user_trades(self, user_address: str) -> List[Trade]:
-        """Get all trades for a user"""
-        return [trade for trade in self.trades 
-                if trade.maker_address == user_address or trade.taker_address == user_address]
+        """Get all trades for a user (scaled integers; see serialize_trade)"""
+        return list(self.user_trades.get(user_address, ()))
+    
+    def get_converter(self, base_currency: str, quote_currency: str) -> Optional[PriceQuantityConverter]:
+        """Get the converter between a pair's scaled integers and Decimal units"""
+        order_book = self.order_books.get((base_currency, quote_currency))
+        return order_book.converter if order_book is not None else None
+    
+    def serialize_order(self, order: Order) -> Dict:
+        """Convert an order's scaled integers back to Decimal units"""
+        converter = self.get_converter(order.base_currency, order.quote_currency)
+        price_from, qty_from = converter.price_from_internal, converter.qty_from_internal
+        return {
+            'id': order.id,
+            'user_address': order.user_address,
+            'side': order.side.value,
+            'order_type': order.order_type.value,
+            'base_currency': order.base_currency,
+            'quote_currency': order.quote_currency,
+            'base_amount': qty_from(order.base_amount),
+            'quote_amount': qty_from(order.quote_amount),
+            'price': price_from(order.price) if order.price is not None else None,
+            'filled_amount': qty_from(order.filled_amount),
+            'remaining_amount': qty_from(order.remaining_amount),
+            'status': order.status.value,
+            'timestamp': order.timestamp,
+            'expires_at': order.expires_at,
+            'stop_price': price_from(order.stop_price) if order.stop_price is not None else None,
+            'take_profit_price': price_from(order.take_profit_price) if order.take_profit_price is not None else None
+        }
+    
+    def serialize_trade(self, trade: Trade) -> Dict:
+        """Convert a trade's scaled integers back to Decimal units"""
+        converter = self.get_converter(trade.base_currency, trade.quote_currency)
+        qty_from = converter.qty_from_internal
+        return {
+            'id': trade.id,
+            'base_currency': trade.base_currency,
+            'quote_currency': trade.quote_currency,
+            'base_amount': qty_from(trade.base_amount),
+            'quote_amount': qty_from(trade.quote_amount),
+            'price': converter.price_from_internal(trade.price),
+            'maker_order_id': trade.maker_order_id,
+            'taker_order_id': trade.taker_order_id,
+            'maker_address': trade.maker_address,
+            'taker_address': trade.taker_address,
+            'timestamp': trade.timestamp,
+            'fee': qty_from(trade.fee)
+        }
+    
+    def _lookup_order(self, order_id: str) -> Optional[Order]:
+        """Find an open order by ID"""
+        pair_key = self.order_index.get(order_id)
+        if pair_key is None:
+            return None
+        return self.order_books[pair_key].get_order(order_id)
     
     def get_order_book(self, base_currency: str, quote_currency: str, depth: int = 20) -> Optional[Dict]:
         """Get order book for a trading pair"""
-        pair_key = f"{base_currency}_{quote_currency}"
-        if pair_key in self.order_books:
-            return self.order_books[pair_key].get_order_book_snapshot(depth)
+        order_book = self.order_books.get((base_currency, quote_currency))
+        if order_book is not None:
+            return order_book.get_order_book_snapshot(depth)
         return None
     
+    def get_liquidity_metrics(self, base_currency: str, quote_currency: str, depth: int = 20) -> Optional[Dict]:
+        """Get liquidity and VWAP over the top levels of a trading pair"""
+        order_book = self.order_books.get((base_currency, quote_currency))
+        if order_book is None:
+            return None
+        
+        bid_prices, bid_sizes, ask_prices, ask_sizes = order_book.snapshot_arrays(depth)
+        bid_liquidity = float(bid_sizes.sum())
+        ask_liquidity = float(ask_sizes.sum())
+        
+        return {
+            'bid_liquidity': bid_liquidity,
+            'ask_liquidity': ask_liquidity,
+            'bid_vwap': float(bid_prices @ bid_sizes) / bid_liquidity if bid_liquidity else None,
+            'ask_vwap': float(ask_prices @ ask_sizes) / ask_liquidity if ask_liquidity else None
+        }
+    
     def get_trading_pairs(self) -> List[Tuple[str, str]]:
         """Get list of available trading pairs"""
         return self.trading_pairs.copy()
     
     def get_market_summary(self) -> Dict[str, Any]:
         """Get market summary for all trading pairs"""
-        summary = {}
+        return self.market_summary_bulk()
+    
+    def market_summary_bulk(self) -> Dict[str, Any]:
+        """Build the market summary for all pairs in one pass with vectorized arithmetic"""
+        books = list(self.order_books.values())
+        n = len(books)
+        best_bids = np.full(n, np.nan)
+        best_asks = np.full(n, np.nan)
+        bid_volumes = np.zeros(n)
+        ask_volumes = np.zeros(n)
+        price_scales = np.empty(n)
+        qty_scales = np.empty(n)
         
-        for base, quote in self.trading_pairs:
-            pair_key = f"{base}_{quote}"
-            order_book = self.order_books[pair_key]
-            
-            best_bid = order_book.get_best_bid()
-            best_ask = order_book.get_best_ask()
-            spread = order_book.get_spread()
-            
-            summary[pair_key] = {
+        # Gather raw top-of-book values; empty sides stay NaN / zero
+        for i, order_book in enumerate(books):
+            price_scales[i] = order_book.converter.price_scale
+            qty_scales[i] = order_book.converter.qty_scale
+            if order_book.bids:
+                level = order_book.bids.peekitem(-1)[1]
+                best_bids[i] = level.price
+                bid_volumes[i] = level.total_amount
+            if order_book.asks:
+                level = order_book.asks.peekitem(0)[1]
+                best_asks[i] = level.price
+                ask_volumes[i] = level.total_amount
+        
+        # Spread on raw ticks first so it is exact before scaling
+        spreads = (best_asks - best_bids) / price_scales
+        best_bids /= price_scales
+        best_asks /= price_scales
+        bid_volumes /= qty_scales
+        ask_volumes /= qty_scales
+        
+        summary = {}
+        for order_book, bid, ask, spread, bid_volume, ask_volume in zip(
+            books, best_bids.tolist(), best_asks.tolist(), spreads.tolist(),
+            bid_volumes.tolist(), ask_volumes.tolist()
+        ):
+            base, quote = order_book.base_currency, order_book.quote_currency
+            summary[f"{base}_{quote}"] = {
                 'base_currency': base,
                 'quote_currency': quote,
-                'best_bid': float(best_bid) if best_bid else None,
-                'best_ask': float(best_ask) if best_ask else None,
-                'spread': float(spread) if spread else None,
-                'bid_volume': float(order_book.buy_levels[best_bid].total_amount) if best_bid else 0,
-                'ask_volume': float(order_book.sell_levels[best_ask].total_amount) if best_ask else 0
+                'best_bid': None if math.isnan(bid) else bid,
+                'best_ask': None if math.isnan(ask) else ask,
+                'spread': None if math.isnan(spread) else spread,
+                'bid_volume': bid_volume,
+                'ask_volume': ask_volume
             }
         
         return summary
@@ -0,0 +1,148 @@
+"""
+Tests for the AI trading engine portfolio tracking
+"""
+
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+import pytest
+
+# The engine imports core.xrpl_client / config from the core platform
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _path in (os.path.join(_ROOT, "core_platform"), os.path.join(_ROOT, "xrpl_applications")):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("sortedcontainers")
+pytest.importorskip("core.xrpl_client")
+
+from ai_trading.ai_trading_engine import AITradingEngine, SignalType, StrategyType, TradingPosition, TradingSignal
+from dex.dex_engine import OrderSide, PriceQuantityConverter
+
+
+def _position(position_id: str, entry_price: str, amount: str, side: OrderSide = OrderSide.BUY,
+              base: str = "XRP", quote: str = "USDC") -> TradingPosition:
+    """Build an open position priced at its entry"""
+    return TradingPosition(
+        id=position_id,
+        base_currency=base,
+        quote_currency=quote,
+        side=side,
+        entry_price=Decimal(entry_price),
+        current_price=Decimal(entry_price),
+        amount=Decimal(amount),
+        pnl=Decimal("0"),
+        pnl_percentage=0.0,
+        timestamp=time.time(),
+        strategy=StrategyType.MOMENTUM
+    )
+
+
+@pytest.fixture
+def engine() -> AITradingEngine:
+    return AITradingEngine(None, None)
+
+
+def test_open_positions_report_exact_decimals(engine):
+    """Float noise from the per-tick path must not leak into the Decimal fields"""
+    engine._add_position(_position("p1", "1.0", "100"))
+    engine.update_portfolio({"XRP_USDC": 1.2})
+
+    position = engine.get_open_positions()[0]
+
+    assert position.pnl == Decimal("20")
+    assert position.current_price == Decimal("1.2")
+
+
+def test_incremental_drawdown_matches_full_rescan(engine):
+    """The streaming max drawdown must equal a rescan of the whole value path"""
+    rng = random.Random(7)
+    engine._add_position(_position("p1", "1.0", "100"))
+
+    values = []
+    for _ in range(500):
+        price = rng.uniform(0.5, 1.5)
+        engine.update_portfolio({"XRP_USDC": price})
+        values.append(price * 100)
+
+    peak = 0.0
+    expected = 0.0
+    for value in values:
+        peak = max(peak, value)
+        expected = max(expected, (peak - value) / peak)
+
+    assert engine.get_portfolio_metrics().max_drawdown == pytest.approx(expected)
+
+
+def test_unchanged_ticks_do_not_add_snapshots(engine):
+    """Repeated identical ticks refresh the last snapshot instead of feeding Sharpe duplicates"""
+    engine._add_position(_position("p1", "1.0", "100"))
+    engine.update_portfolio({"XRP_USDC": 1.1})
+    first_timestamp = engine.portfolio_history[-1].timestamp
+
+    engine.update_portfolio({"XRP_USDC": 1.1})
+    engine.update_portfolio({})
+
+    assert len(engine.portfolio_history) == 1
+    assert list(engine._snapshot_values) == [pytest.approx(110.0)]
+    assert engine.portfolio_history[-1].timestamp >= first_timestamp
+    assert engine._snapshot_ts[-1] == engine.portfolio_history[-1].timestamp
+
+    engine.update_portfolio({"XRP_USDC": 1.2})
+
+    assert len(engine.portfolio_history) == 2
+    assert list(engine._snapshot_values) == [pytest.approx(110.0), pytest.approx(120.0)]
+
+
+def test_running_totals_match_full_recompute(engine):
+    """Per-position deltas must keep totals equal to a from-scratch sum"""
+    rng = random.Random(11)
+    pairs = [("XRP", "USDC"), ("BTC", "USDC"), ("ETH", "USDC")]
+    prices = {f"{base}_{quote}": 1.0 for base, quote in pairs}
+
+    for i in range(200):
+        roll = rng.random()
+        if roll < 0.2:
+            base, quote = rng.choice(pairs)
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            entry = f"{prices[f'{base}_{quote}']:.4f}"
+            engine._add_position(_position(f"p{i}", entry, str(rng.randint(1, 50)), side, base, quote))
+        elif roll < 0.3 and engine._open_positions:
+            position = rng.choice(list(engine._open_positions.values()))
+            engine._set_status(position, "closed")
+        else:
+            # Only some pairs tick, as when prices dribble in over the stream
+            ticked = rng.sample(list(prices), rng.randint(1, len(prices)))
+            for key in ticked:
+                prices[key] = rng.uniform(0.5, 1.5)
+            engine.update_portfolio({key: prices[key] for key in ticked})
+
+        open_positions = engine._open_positions.values()
+        expected_value = sum(p._current_price_f * p._amount_f for p in open_positions)
+        expected_pnl = sum(p._pnl_f for p in open_positions)
+        assert engine._total_value_f == pytest.approx(expected_value, abs=1e-6)
+        assert engine._total_pnl_f == pytest.approx(expected_pnl, abs=1e-6)
+
+
+@pytest.mark.parametrize("confidence", [0.7, 0.73, 0.123456789])
+def test_position_sizes_are_on_the_dex_lot_grid(engine, confidence):
+    """Sizes from float math must survive the DEX's off-grid rejection"""
+    signal = TradingSignal(
+        id="s1",
+        strategy=StrategyType.MOMENTUM,
+        signal_type=SignalType.BUY,
+        base_currency="XRP",
+        quote_currency="USDC",
+        price=Decimal("1"),
+        confidence=confidence,
+        timestamp=time.time()
+    )
+    size = engine._calculate_position_size(signal)
+
+    assert PriceQuantityConverter().qty_to_internal(float(size)) > 0
@@ -0,0 +1,53 @@
+"""
+Tests for the arbitrage bot exchange request helpers
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("orjson")
+pytest.importorskip("websockets")
+
+from arbitrage_bot import arbitrage_bot
+
+
+@pytest.mark.parametrize("symbol, product_id", [
+    ("XRPUSDT", "XRP-USD"),
+    ("BTCUSDC", "BTC-USD"),
+    ("ETHBTC", "ETH-BTC"),
+])
+def test_coinbase_rest_url_uses_stream_product_id(symbol, product_id):
+    """The REST fallback must fetch the same product the stream subscribes to"""
+    assert arbitrage_bot._coinbase_product_id(symbol) == product_id
+    url = arbitrage_bot._coinbase_price_url("https://api.exchange.coinbase.com", symbol)
+    assert url == f"https://api.exchange.coinbase.com/products/{product_id}/ticker"
+
+
+def _make_bot(tmp_path, coinbase):
+    """Build a bot from a config file with only Coinbase credentials"""
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"coinbase": coinbase}))
+    return arbitrage_bot.XRPLArbitrageBot(str(config_file))
+
+
+def test_coinbase_template_uses_passphrase_header(tmp_path):
+    bot = _make_bot(tmp_path, {"api_key": "key", "secret_key": "c2VjcmV0", "passphrase": "pass"})
+    assert bot._account_headers["coinbase"] == {"CB-ACCESS-KEY": "key", "CB-ACCESS-PASSPHRASE": "pass"}
+
+
+def test_coinbase_template_skipped_without_passphrase(tmp_path):
+    """A missing passphrase fails fast instead of signing requests with a blank one"""
+    bot = _make_bot(tmp_path, {"api_key": "key", "secret_key": "c2VjcmV0"})
+    assert "coinbase" not in bot._account_headers
+
+    with pytest.raises(ValueError, match="passphrase"):
+        asyncio.run(bot.get_coinbase_balance("XRP"))
@@ -0,0 +1,198 @@
+"""
+Tests for the DEX trading engine matching paths
+"""
+
+import asyncio
+import os
+import random
+import sys
+from decimal import Decimal
+
+import pytest
+
+# The engine imports core.xrpl_client / config from the core platform
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _path in (os.path.join(_ROOT, "core_platform"), os.path.join(_ROOT, "xrpl_applications")):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+pytest.importorskip("numpy")
+pytest.importorskip("sortedcontainers")
+pytest.importorskip("numba")
+pytest.importorskip("core.xrpl_client")
+
+from dex import dex_engine
+from dex.dex_engine import DEXTradingEngine, Order, OrderBook, OrderSide, OrderType, PriceQuantityConverter
+
+USERS = "abcdef"
+
+
+def _new_engine() -> DEXTradingEngine:
+    """Create an engine with one funded trading pair"""
+    engine = DEXTradingEngine(None)
+    engine.add_trading_pair("XRP", "USDC")
+    for user in USERS:
+        engine.balances[(user, "XRP")] = 10 ** 14
+        engine.balances[(user, "USDC")] = 10 ** 14
+    return engine
+
+
+async def _run_random_session(seed: int):
+    """Replay a seeded mix of limit orders and cancels, returning the resulting state"""
+    rng = random.Random(seed)
+    engine = _new_engine()
+    placed = []
+    for _ in range(300):
+        if placed and rng.random() < 0.15:
+            order_id, user = rng.choice(placed)
+            await engine.cancel_order(user, order_id)
+        else:
+            user = rng.choice(USERS)
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            order = await engine.place_order(
+                user, side, OrderType.LIMIT, "XRP", "USDC",
+                rng.randint(1, 20), price=round(rng.uniform(0.9, 1.1), 2)
+            )
+            if order is not None:
+                placed.append((order.id, user))
+
+    order_book = engine.order_books[("XRP", "USDC")]
+    for levels in (order_book.bids, order_book.asks):
+        for level in levels.values():
+            live = [order for order in level.orders if not order.cancelled]
+            assert level.order_count == len(live)
+            assert level.total_amount == sum(order.remaining_amount for order in live)
+
+    trades = [(t.base_amount, t.price, t.maker_address, t.taker_address, t.fee) for t in engine.trades]
+    snapshot = engine.get_order_book("XRP", "USDC", 50)
+    return trades, snapshot["bids"], snapshot["asks"], dict(engine.balances)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compiled_matching_matches_python(monkeypatch, seed):
+    """The numba sweep must produce the same trades and book as the Python loop"""
+    monkeypatch.setattr(dex_engine, "NUMBA_AVAILABLE", False)
+    expected = asyncio.run(_run_random_session(seed))
+    monkeypatch.setattr(dex_engine, "NUMBA_AVAILABLE", True)
+    actual = asyncio.run(_run_random_session(seed))
+
+    assert expected[0], "session produced no trades"
+    assert actual == expected
+
+
+def test_cached_snapshot_is_not_shared():
+    """Mutating a returned snapshot must not leak into the cache"""
+    engine = _new_engine()
+    asyncio.run(engine.place_order("a", OrderSide.BUY, OrderType.LIMIT, "XRP", "USDC", 5, price=1))
+
+    snapshot = engine.get_order_book("XRP", "USDC", 5)
+    snapshot["bids"][0]["amount"] = 0
+
+    assert engine.get_order_book("XRP", "USDC", 5)["bids"][0]["amount"] == 5
+
+
+def test_price_less_orders_stay_out_of_price_levels():
+    order_book = OrderBook("XRP", "USDC")
+    stop = Order("stop-1", "a", OrderSide.SELL, OrderType.STOP_LOSS, "XRP", "USDC", 5, 0, stop_price=90)
+
+    assert not order_book.add_order(stop)
+    assert not order_book.bids and not order_book.asks
+
+    assert order_book.add_trigger_order(stop)
+    assert order_book.get_order("stop-1") is stop
+    assert not order_book.bids and not order_book.asks
+
+    assert order_book.remove_order("stop-1")
+    assert stop.cancelled and order_book.get_order("stop-1") is None
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_limit_orders_match_after_a_stop_order(monkeypatch, compiled):
+    """A stop order must not poison the book for later limit orders on either path"""
+    monkeypatch.setattr(dex_engine, "NUMBA_AVAILABLE", compiled)
+    engine = _new_engine()
+
+    async def run():
+        await engine.place_order("a", OrderSide.SELL, OrderType.STOP_LOSS, "XRP", "USDC", 5, stop_price="0.9")
+        await engine.place_order("b", OrderSide.SELL, OrderType.LIMIT, "XRP", "USDC", 3, price=1)
+        return await engine.place_order("c", OrderSide.BUY, OrderType.LIMIT, "XRP", "USDC", 3, price=1)
+
+    buy = asyncio.run(run())
+
+    assert buy is not None and buy.remaining_amount == 0
+    assert len(engine.trades) == 1
+    order_book = engine.order_books[("XRP", "USDC")]
+    assert None not in order_book.bids and None not in order_book.asks
+
+
+def test_stop_order_is_held_as_trigger_with_its_reservation():
+    """A stop order is returned, reserved, kept out of the levels, and cancellable"""
+    engine = _new_engine()
+    order_book = engine.order_books[("XRP", "USDC")]
+    lot = order_book.converter.qty_scale
+    start = dict(engine.balances)
+
+    stop = asyncio.run(engine.place_order("a", OrderSide.SELL, OrderType.STOP_LOSS, "XRP", "USDC", 5, stop_price="0.9"))
+
+    assert stop is not None
+    assert order_book.trigger_orders == {stop.id: stop}
+    assert not order_book.bids and not order_book.asks
+    assert engine.balances[("a", "XRP")] == start[("a", "XRP")] - 5 * lot
+    assert engine.balances[("a", "USDC")] == start[("a", "USDC")]
+    assert engine.get_user_orders("a") == [stop]
+
+    assert asyncio.run(engine.cancel_order("a", stop.id))
+    assert not order_book.trigger_orders
+    assert engine.balances == start
+
+
+def test_orders_and_trades_share_one_unit_boundary():
+    """place_order and the getters return scaled objects; serializers convert to Decimals"""
+    engine = _new_engine()
+    converter = engine.get_converter("XRP", "USDC")
+
+    async def run():
+        resting = await engine.place_order("a", OrderSide.SELL, OrderType.LIMIT, "XRP", "USDC", 5, price="1.25")
+        await engine.place_order("b", OrderSide.BUY, OrderType.LIMIT, "XRP", "USDC", 2, price="1.25")
+        return resting
+
+    resting = asyncio.run(run())
+
+    assert engine.get_user_orders("a") == [resting]
+    assert resting.price == converter.price_to_internal("1.25")
+    [trade] = engine.get_user_trades("a")
+    assert trade.base_amount == converter.qty_to_internal(2)
+
+    order_view = engine.serialize_order(resting)
+    assert order_view["price"] == Decimal("1.25")
+    assert order_view["remaining_amount"] == Decimal("3")
+    trade_view = engine.serialize_trade(trade)
+    assert (trade_view["base_amount"], trade_view["price"], trade_view["quote_amount"]) == (
+        Decimal("2"), Decimal("1.25"), Decimal("2.5")
+    )
+
+
+def test_converter_rejects_values_off_the_grid():
+    converter = PriceQuantityConverter(price_decimals=4, qty_decimals=8)
+
+    assert converter.qty_to_internal("0.00000001") == 1
+    assert converter.qty_to_internal(0.1) == 10_000_000
+    assert converter.price_to_internal(Decimal("1.2500000")) == 12_500
+
+    # Below half a lot used to round to 0 and other values were silently changed
+    for amount in ("0.000000004", "0.000000016", Decimal("1.123456789")):
+        with pytest.raises(ValueError, match="1e-8"):
+            converter.qty_to_internal(amount)
+    with pytest.raises(ValueError, match="1e-4"):
+        converter.price_to_internal("1.00005")
+
+
+def test_off_grid_order_is_rejected_without_side_effects():
+    engine = _new_engine()
+    start = dict(engine.balances)
+
+    order = asyncio.run(engine.place_order("a", OrderSide.BUY, OrderType.LIMIT, "XRP", "USDC", "0.000000004", price=1))
+
+    assert order is None
+    assert engine.balances == start
+    assert not engine.order_books[("XRP", "USDC")].orders
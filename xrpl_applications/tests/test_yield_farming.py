@@ -0,0 +1,135 @@
+"""
+Tests for the yield farming engine user indexes and rate limits
+"""
+
+import asyncio
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+# The engine imports core.xrpl_client / config from the core platform
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _path in (os.path.join(_ROOT, "core_platform"), os.path.join(_ROOT, "xrpl_applications")):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+pytest.importorskip("numpy")
+pytest.importorskip("sortedcontainers")
+pytest.importorskip("core.xrpl_client")
+
+from defi.yield_farming import YieldFarmingEngine
+
+POOL = "xrp-usdc-pool"  # min stake 100, max stake 100000
+
+
+@pytest.fixture
+def engine() -> YieldFarmingEngine:
+    return YieldFarmingEngine(None)
+
+
+def test_positions_are_indexed_per_user(engine):
+    asyncio.run(engine.stake_tokens("alice", POOL, Decimal("100")))
+    asyncio.run(engine.stake_tokens("alice", POOL, Decimal("200")))
+    asyncio.run(engine.stake_tokens("bob", POOL, Decimal("300")))
+
+    assert len(engine.positions_by_user["alice"]) == 2
+    assert len(engine.positions_by_user["bob"]) == 1
+
+    positions = asyncio.run(engine.get_user_positions("alice"))
+    assert sorted(p["staked_amount"] for p in positions) == ["100", "200"]
+    assert asyncio.run(engine.get_user_positions("carol")) == []
+
+
+def test_concentration_limit_counts_only_own_positions(engine):
+    """Other users' stakes must not count toward a user's concentration limit"""
+    assert asyncio.run(engine.stake_tokens("bob", POOL, Decimal("100000")))
+    assert asyncio.run(engine.stake_tokens("bob", POOL, Decimal("100000")))
+
+    assert engine._validate_stake_request("alice", POOL, Decimal("100000")) is not None
+    assert engine._validate_stake_request("bob", POOL, Decimal("100")) is None
+
+
+def test_flash_loan_history_counts_only_own_loans(engine):
+    async def borrow(user):
+        return await engine.execute_flash_loan(user, Decimal("1000"), "XRP", Decimal("0"), "XRP", [])
+
+    async def run():
+        for _ in range(5):
+            await borrow("alice")
+            await borrow("bob")
+        engine._expiry_task.cancel()
+
+    asyncio.run(run())
+
+    assert len(engine.flash_loans_by_user["alice"]) == 5
+    assert len(engine.flash_loans_by_user["bob"]) == 5
+    assert engine._validate_flash_loan("alice", Decimal("1000"), "XRP")
+
+
+def _stake(engine, user="alice"):
+    return asyncio.run(engine.stake_tokens(user, POOL, Decimal("100")))
+
+
+def _stake_batch(engine, count, user="alice"):
+    return asyncio.run(engine.stake_tokens_batch(user, [(POOL, Decimal("100"))] * count))
+
+
+def test_batch_charges_one_rate_limit_token_per_request(engine):
+    assert _stake_batch(engine, 3) == [True] * 3
+
+    # Limit is 10 stakes per window: 3 batched + 7 single
+    assert all(_stake(engine) for _ in range(7))
+    assert not _stake(engine)
+
+
+def test_batch_over_the_limit_is_rejected_up_front(engine):
+    """A batch that would exceed the limit stakes nothing and charges nothing"""
+    assert all(_stake(engine) for _ in range(8))
+
+    assert _stake_batch(engine, 3) == [False] * 3
+    assert len(engine.positions_by_user["alice"]) == 8
+
+    assert _stake_batch(engine, 2) == [True] * 2
+    assert len(engine.positions_by_user["alice"]) == 10
+
+
+def test_batch_failure_leaves_no_partial_state(engine, monkeypatch):
+    pool = engine.pools[POOL]
+    liquidity, shares = pool.total_liquidity, pool.total_shares
+    generate = engine._generate_secure_id
+    calls = []
+
+    def failing_id():
+        calls.append(None)
+        if len(calls) == 2:
+            raise RuntimeError("entropy unavailable")
+        return generate()
+
+    monkeypatch.setattr(engine, "_generate_secure_id", failing_id)
+
+    assert _stake_batch(engine, 3) == [False] * 3
+    assert not engine.positions_by_user.get("alice")
+    assert engine._pos_user == []
+    assert (pool.total_liquidity, pool.total_shares) == (liquidity, shares)
+    assert not engine.rate_limits.get(("alice", "stake"))
+
+
+def test_batch_shares_match_sequential_stakes():
+    """Staging against running pool totals gives the same shares as one stake at a time"""
+    sequential, batched = YieldFarmingEngine(None), YieldFarmingEngine(None)
+    for engine in (sequential, batched):
+        engine.pools[POOL].total_shares = Decimal("2000000")
+
+    amounts = [Decimal("100"), Decimal("2500"), Decimal("333")]
+    for amount in amounts:
+        asyncio.run(sequential.stake_tokens("alice", POOL, amount))
+    asyncio.run(batched.stake_tokens_batch("alice", [(POOL, amount) for amount in amounts]))
+
+    def shares(engine):
+        positions = asyncio.run(engine.get_user_positions("alice"))
+        return sorted(Decimal(p["shares"]) for p in positions)
+
+    assert shares(batched) == shares(sequential)
+    assert batched.pools[POOL].total_shares == sequential.pools[POOL].total_shares